@@ -56,9 +56,12 @@ INSTALLED_APPS = [
     'card',
     'shopper',
     'mycards',
+    'receipt',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TimingMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +69,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -152,6 +156,53 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Per-process caches, invalidated by signals in the process making a change;
+# other processes see the change once their entry times out. The catalogue
+# is shared through redis when CATALOGUE_CACHE_URL is set, so a change made
+# in one process is seen by all of them at once. Tests always run with
+# per-process caches.
+CATALOGUE_CACHE_URL = os.environ.get('CATALOGUE_CACHE_URL', '')
+# API tokens are shared the same way through TOKEN_CACHE_URL. Kept per
+# process, a deleted token or deactivated user is only dropped in the
+# process that changed it, so they are then kept a few seconds only.
+TOKEN_CACHE_URL = os.environ.get('TOKEN_CACHE_URL', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tokens': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': TOKEN_CACHE_URL,
+        'TIMEOUT': 300,
+    } if TOKEN_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tokens',
+        'TIMEOUT': 5,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'catalogue': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': CATALOGUE_CACHE_URL,
+        'TIMEOUT': 300,
+    } if CATALOGUE_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalogue',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# API tokens with their user, dropped when the token is deleted or the
+# user saved.
+TOKEN_CACHE_ALIAS = 'tokens'
+
+# Serialized companies with their cards and logo, versioned per company
+# and bumped on every change.
+CATALOGUE_CACHE_ALIAS = 'catalogue'
+
+TEST_RUNNER = 'core.testing.TestRunner'
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -161,4 +212,96 @@ PHONENUMBER_DEFAULT_REGION = "GB"
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+}
+
+# Seconds before a worker reloads its in-process company distance index
+# to pick up companies changed by other workers.
+COMPANY_INDEX_MAX_AGE = int(os.environ.get('COMPANY_INDEX_MAX_AGE', 60))
+
+# Location used for distances when a request cannot be located.
+DEFAULT_LOCATION = (51.633789, -0.125860)
+
+# Client IP geolocation: the offline GeoIP table is tried first, then the
+# optional remote service, e.g. 'http://api.ipstack.com/{ip}?access_key=..'
+# Located addresses are kept GEOIP_CACHE_TTL seconds in each process.
+GEOIP_CACHE_SIZE = 4096
+GEOIP_CACHE_TTL = 3600
+GEOIP_REMOTE_URL = os.environ.get('GEOIP_REMOTE_URL', '')
+GEOIP_REMOTE_POOL_SIZE = 10
+GEOIP_REMOTE_TIMEOUT = (0.2, 0.5)
+
+# Post codes kept in each process in front of the GeocodeCache table.
+GEOCODE_CACHE_SIZE = 10000
+
+# 'nominatim' asks OpenStreetMap, 'gazetteer' answers from the post code
+# centroids loaded with `manage.py load_postcodes`, 'stub' makes up points
+# around London without any lookup, for load tests.
+GEOCODER_BACKEND = os.environ.get('GEOCODER_BACKEND', 'nominatim')
+
+# Celery workers process the receipts uploaded by shoppers.
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
+CELERY_TASK_ALWAYS_EAGER = bool(
+    int(os.environ.get('CELERY_TASK_ALWAYS_EAGER', 0)))
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Receipt OCR results kept by image hash; the least recently used are
+# evicted past this size every OCR_CACHE_EVICTION_INTERVAL seconds. Hits
+# mark an entry used at most once every OCR_CACHE_TOUCH_INTERVAL seconds.
+OCR_CACHE_MAX_ENTRIES = int(os.environ.get('OCR_CACHE_MAX_ENTRIES', 10000))
+OCR_CACHE_EVICTION_INTERVAL = 3600
+OCR_CACHE_TOUCH_INTERVAL = 3600
+
+# Receipt photos can be straightened, shrunk to OCR_MAX_SIDE pixels,
+# binarized and cropped to the text before tesseract reads them. Off
+# until `manage.py bench_ocr` shows it does not hurt recognition.
+OCR_PREPROCESS = bool(int(os.environ.get('OCR_PREPROCESS', 0)))
+OCR_MAX_SIDE = 2000
+
+# Processes kept reading receipts with the tesseract model loaded. Leave
+# at 0 in the Celery workers, whose processes already form the pool.
+OCR_POOL_SIZE = int(os.environ.get('OCR_POOL_SIZE', 0))
+OCR_LANG = 'eng'
+
+# 'tesseract' reads the receipts, 'stub' takes the text synthetic receipts
+# carry in their metadata instead, for load tests.
+OCR_BACKEND = os.environ.get('OCR_BACKEND', 'tesseract')
+
+# Point events are appended to the ledger in batches and folded into the
+# card balances every POINT_COMPACTION_INTERVAL seconds, skipping events
+# younger than POINT_COMPACTION_LAG seconds that may not be committed yet.
+POINT_EVENT_BATCH_SIZE = 1000
+POINT_COMPACTION_LAG = 30
+POINT_COMPACTION_INTERVAL = int(
+    os.environ.get('POINT_COMPACTION_INTERVAL', 300))
+CELERY_BEAT_SCHEDULE = {
+    'compact-point-balances': {
+        'task': 'core.tasks.compact_point_balances',
+        'schedule': POINT_COMPACTION_INTERVAL,
+    },
+    'evict-ocr-cache': {
+        'task': 'receipt.tasks.evict_ocr_cache',
+        'schedule': OCR_CACHE_EVICTION_INTERVAL,
+    },
+}
+
+# Shopper and company ids of each user cached in every process for
+# request.profile; saves in other processes are seen after the TTL.
+PROFILE_CACHE_TTL = 60
+PROFILE_CACHE_SIZE = 10000
+
+# Directory shared by the web and Celery processes where each one keeps
+# its metrics for /metrics, which only METRICS_ALLOWED_IPS may read.
+# Metrics are not recorded when it is empty.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+# Subdirectory of METRICS_DIR holding the files of this service, cleared
+# by `manage.py clear_metrics` when the service starts.
+METRICS_SERVICE = os.environ.get('METRICS_SERVICE', 'web')
+METRICS_ALLOWED_IPS = os.environ.get(
+    'METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+
+# Staging logs the statements a request runs QUERY_REPEAT_THRESHOLD times
+# or more, and those slower than SLOW_QUERY_MS milliseconds.
+QUERY_INSPECTOR = bool(int(os.environ.get('QUERY_INSPECTOR', 0)))
+QUERY_REPEAT_THRESHOLD = 3
+SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
@@ -25,6 +25,8 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from core.views import GeocodeStatsView, MetricsView, TimingStatsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -36,6 +38,17 @@ urlpatterns = [
     path('api/user/', include('user.urls')),
     path('api/company/', include('company.urls')),
     path('api/shopper/', include('shopper.urls')),
+    path(
+        'api/geocode/stats/',
+        GeocodeStatsView.as_view(),
+        name='geocode-stats'
+    ),
+    path(
+        'api/timing/stats/',
+        TimingStatsView.as_view(),
+        name='timing-stats'
+    ),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -9,6 +9,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Card, Company
+from core.testing import QueryCountMixin
 
 from card.serializers import (
     CardSerializer,
@@ -59,7 +60,7 @@ class PublicCardAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateCardAPITests(TestCase):
+class PrivateCardAPITests(QueryCountMixin, TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
@@ -95,6 +96,15 @@ class PrivateCardAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_card_list_query_budget(self):
+        """Test listing cards runs a fixed number of queries."""
+        for _ in range(5):
+            create_card(company=self.company)
+
+        with self.assertQueryBudget(4):
+            res = self.client.get(CARDS_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_card_list_limited_to_user(self):
         """Test list of cards is limited to authenticated user."""
         user = create_user(
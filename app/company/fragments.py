@@ -0,0 +1,132 @@
+"""Serialized companies cached per company behind version counters."""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.models import Company
+
+
+def get_cache():
+    """Return the cache holding the company fragments."""
+    return caches[settings.CATALOGUE_CACHE_ALIAS]
+
+
+# Version counter of the whole catalogue, bumped with every company.
+CATALOGUE_KEY = 'catalogue:version'
+# Version counter of the company locations, bumped when one is saved or
+# deleted so every process reloads its distance index.
+LOCATIONS_KEY = 'catalogue:locations'
+
+
+def version_key(company_id):
+    """Return the cache key of the version counter of a company."""
+    return f'company:{company_id}:version'
+
+
+def fragment_key(company_id, version):
+    """Return the cache key of a version of a serialized company."""
+    return f'company:{company_id}:{version}'
+
+
+def bump(company_id, moved=False):
+    """
+    Move a company and the catalogue to a new version, orphaning the
+    cached fragment of the company, and the locations too if moved.
+    """
+    cache = get_cache()
+    keys = [CATALOGUE_KEY, version_key(company_id)]
+    if moved:
+        keys.append(LOCATIONS_KEY)
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No version yet, so nothing was handed out under it.
+            pass
+
+
+def current(keys):
+    """Return the version under each key, starting the missing ones."""
+    cache = get_cache()
+    found = cache.get_many(keys)
+    # Start from the clock so a counter evicted from the cache never
+    # comes back at a version that was already used. Counters expire
+    # like the fragments, so a process that missed a bump made in
+    # another one moves on once they time out.
+    new = {key: time.time_ns() for key in keys if key not in found}
+    if new:
+        cache.set_many(new)
+        found.update(new)
+
+    return found
+
+
+def versions(company_ids):
+    """Return the current version of each company."""
+    keys = {company_id: version_key(company_id) for company_id in company_ids}
+    found = current(list(keys.values()))
+
+    return {
+        company_id: found[key] for company_id, key in keys.items()
+    }
+
+
+def catalogue_version():
+    """Return the current version of the whole catalogue."""
+    return current([CATALOGUE_KEY])[CATALOGUE_KEY]
+
+
+def locations_version():
+    """Return the current version of the company locations."""
+    return current([LOCATIONS_KEY])[LOCATIONS_KEY]
+
+
+def absolute(item, request):
+    """Return a serialized company with its logo URL built for a request."""
+    image = item.get('image')
+    if not image or not image.get('logo'):
+        return item
+
+    return dict(item, image=dict(
+        image, logo=request.build_absolute_uri(image['logo'])))
+
+
+def fragments(company_ids, request=None):
+    """
+    Return the serialized companies by id, serializing and caching
+    only those changed since they were last cached.
+
+    The fragments are cached with relative logo URLs, shared by every
+    host, and made absolute for the request when one is given.
+    """
+    from company.serializers import CompanySerializer
+
+    cache = get_cache()
+    keys = {
+        company_id: fragment_key(company_id, version)
+        for company_id, version in versions(company_ids).items()
+    }
+    cached = cache.get_many(keys.values())
+    result = {
+        company_id: cached[key] for company_id, key in keys.items()
+        if key in cached
+    }
+    missing = [
+        company_id for company_id in company_ids if company_id not in result
+    ]
+    if missing:
+        companies = Company.objects.filter(pk__in=missing).select_related(
+            'companylogo').prefetch_related('card_set')
+        data = CompanySerializer(companies, many=True).data
+        cache.set_many({keys[item['id']]: item for item in data})
+        result.update((item['id'], item) for item in data)
+
+    if request is not None:
+        result = {
+            company_id: absolute(item, request)
+            for company_id, item in result.items()
+        }
+
+    return result
@@ -0,0 +1,81 @@
+"""Keyset pagination of companies ordered by distance."""
+
+import base64
+import binascii
+import math
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(distance, pk):
+    """Return the cursor pointing after the company pk at distance."""
+    position = f'{distance!r}:{pk}'.encode()
+
+    return base64.urlsafe_b64encode(position).decode()
+
+
+def decode_cursor(cursor):
+    """Return the (distance, id) a cursor points after."""
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+        distance, pk = position.split(':')
+        distance, pk = float(distance), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    if not math.isfinite(distance):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+
+    return distance, pk
+
+
+class DistanceCursorPagination:
+    """
+    Paginate companies by (distance, id) using limit, radius and cursor
+    query parameters, so a page only ranks and serializes its own rows.
+    """
+    default_limit = 20
+    max_limit = 100
+
+    def __init__(self, request):
+        self.request = request
+        self.limit = self.positive('limit', int, self.default_limit)
+        self.limit = min(self.limit, self.max_limit)
+        self.radius = self.positive('radius', float, None)
+        cursor = request.query_params.get('cursor')
+        self.after = decode_cursor(cursor) if cursor else None
+        self.next = None
+
+    def positive(self, name, cast, default):
+        """Return a positive query parameter or default when missing."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            value = cast(value)
+        except ValueError:
+            value = 0
+        if not math.isfinite(value) or value <= 0:
+            raise ValidationError({name: 'Must be a positive number.'})
+
+        return value
+
+    def paginate(self, ranked):
+        """
+        Return the page from (distance, id) pairs ranked one past limit,
+        remembering the cursor to the next page.
+        """
+        page = ranked[:self.limit]
+        if len(ranked) > self.limit:
+            distance, pk = page[-1]
+            self.next = replace_query_param(
+                self.request.build_absolute_uri(),
+                'cursor', encode_cursor(distance, pk),
+            )
+
+        return page
+
+    def get_paginated_response(self, data):
+        """Return the page wrapped with the link to the next one."""
+        return Response({'next': self.next, 'results': data})
@@ -25,23 +25,15 @@ class RestrictiveImageSerializer(serializers.ModelSerializer):
 
 class CompanySerializer(serializers.ModelSerializer):
     """Serializer for companies."""
-    card = CardDetailSerializer(many=True, read_only=True)
-    image = RestrictiveImageSerializer(many=True, read_only=True)
-    distance = serializers.SerializerMethodField()
+    card = CardDetailSerializer(
+        source='card_set', many=True, read_only=True)
+    image = RestrictiveImageSerializer(
+        source='companylogo', read_only=True, allow_null=True)
 
     class Meta:
         model = Company
-        fields = [
-            'id', 'company_name', 'lat', 'long', 'distance', 'card', 'image'
-            ]
-        read_only_fields = ['id', 'lat', 'long', 'distance']
-
-    def get_distance(self, company):
-        """Return context"""
-        if self.context['distances'][company.pk]:
-            return self.context['distances'][company.pk]
-        else:
-            raise 'Distance could not be loaded'
+        fields = ['id', 'company_name', 'lat', 'long', 'card', 'image']
+        read_only_fields = ['id', 'lat', 'long']
 
 
 class CompanyDetailSerializer(CompanySerializer):
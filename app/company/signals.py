@@ -0,0 +1,33 @@
+"""Signal handlers invalidating the cached company fragments."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from company import fragments
+from core.models import Card, Company, CompanyLogo
+
+
+def bump(company_id, moved=False):
+    """
+    Bump the versions of a company now and again once the change is
+    committed, so nothing read from the database in between is kept.
+    """
+    fragments.bump(company_id, moved)
+    transaction.on_commit(lambda: fragments.bump(company_id, moved))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company(sender, instance, **kwargs):
+    """Drop the cached fragment and locations of a changed company."""
+    bump(instance.pk, moved=True)
+
+
+@receiver(post_save, sender=Card)
+@receiver(post_delete, sender=Card)
+@receiver(post_save, sender=CompanyLogo)
+@receiver(post_delete, sender=CompanyLogo)
+def invalidate_company_part(sender, instance, **kwargs):
+    """Drop the cached fragment of the company of a card or logo."""
+    bump(instance.company_id)
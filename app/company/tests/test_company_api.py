@@ -7,8 +7,11 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core import distance, geo
 from core.models import Company
+from core.testing import QueryCountMixin
 
+from company import fragments, pagination
 from company.serializers import CompanyDetailSerializer
 
 
@@ -31,6 +34,12 @@ def create_company(user, **params):
     return company
 
 
+def place_company(company, lat, long):
+    """Move a company to the given coordinates."""
+    Company.objects.filter(pk=company.pk).update(
+        lat=lat, long=long, geohash=geo.encode(lat, long))
+
+
 def create_user(**params):
     """Create and return a new user"""
     return get_user_model().objects.create_superuser(**params)
@@ -60,7 +69,7 @@ class PublicCardAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateCompanyAPITests(TestCase):
+class PrivateCompanyAPITests(QueryCountMixin, TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
@@ -209,3 +218,77 @@ class PrivateCompanyAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         self.assertTrue(Company.objects.filter(id=company.id).exists())
+
+    def test_list_nearest_companies_paginated(self):
+        """Test companies are listed by distance one page at a time."""
+        for name, lat, long in [
+            ('Far', 53.48, -2.24),
+            ('Near', 51.501, -0.121),
+            ('Middle', 51.6, -0.2),
+        ]:
+            place_company(
+                create_company(user=self.user, company_name=name), lat, long)
+        distance.companies.refresh()
+
+        res = self.client.get(
+            COMPANY_URL, {'lat': 51.5, 'lng': -0.12, 'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [c['company_name'] for c in res.data['results']]
+        self.assertEqual(names, ['Near', 'Middle'])
+        self.assertLess(res.data['results'][0]['distance'], 1)
+        self.assertIsNotNone(res.data['next'])
+
+        res = self.client.get(res.data['next'])
+
+        names = [c['company_name'] for c in res.data['results']]
+        self.assertEqual(names, ['Far'])
+        self.assertIsNone(res.data['next'])
+
+    def test_list_companies_within_radius(self):
+        """Test only the companies within the radius are listed."""
+        place_company(
+            create_company(user=self.user, company_name='Near'),
+            51.501, -0.121)
+        place_company(
+            create_company(user=self.user, company_name='Far'),
+            53.48, -2.24)
+
+        res = self.client.get(
+            COMPANY_URL, {'lat': 51.5, 'lng': -0.12, 'radius': 10})
+
+        names = [c['company_name'] for c in res.data['results']]
+        self.assertEqual(names, ['Near'])
+
+    def test_list_query_budget(self):
+        """Test listing companies runs a fixed number of queries."""
+        for number in range(5):
+            create_company(user=self.user, company_name=f'Company {number}')
+        distance.companies.ensure_version(fragments.locations_version())
+
+        with self.assertQueryBudget(2):
+            res = self.client.get(COMPANY_URL, {'lat': 51.5, 'lng': -0.12})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_non_finite_radius_rejected(self):
+        """Test infinite and not-a-number radiuses are rejected."""
+        for radius in ('inf', '1e400', 'nan'):
+            res = self.client.get(
+                COMPANY_URL, {'lat': 51.5, 'lng': -0.12, 'radius': radius})
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, radius)
+
+    def test_list_non_finite_cursor_rejected(self):
+        """Test a cursor at a not-a-number distance is rejected."""
+        res = self.client.get(
+            COMPANY_URL, {'cursor': pagination.encode_cursor(float('nan'), 1)})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_invalid_parameters(self):
+        """Test invalid pagination parameters are rejected."""
+        res = self.client.get(COMPANY_URL, {'limit': -1})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(COMPANY_URL, {'cursor': 'nonsense'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', res.data)
@@ -0,0 +1,103 @@
+"""Test the cached company fragments."""
+
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import RequestFactory, TestCase, override_settings
+
+from company import fragments
+from core.models import Card, CompanyLogo
+from core.management.commands import creating
+
+
+class FragmentTests(TestCase):
+    """Test serializing companies through the fragment cache."""
+
+    def setUp(self):
+        fragments.get_cache().clear()
+        staff = creating.create_staff(email='fragments@example.com')
+        self.company = creating.create_company(user=staff)
+        self.card = creating.create_card(company=self.company)
+
+    def test_fragment_serialized(self):
+        """Test a fragment holds the company with its cards."""
+        fragment = fragments.fragments([self.company.pk])[self.company.pk]
+
+        self.assertEqual(fragment['company_name'], 'Company Sample')
+        self.assertEqual(fragment['card'][0]['id'], self.card.pk)
+        self.assertIsNone(fragment['image'])
+
+    def test_fragment_cached(self):
+        """Test a fragment is only serialized once."""
+        fragments.fragments([self.company.pk])
+
+        with self.assertNumQueries(0):
+            fragments.fragments([self.company.pk])
+
+    def test_company_change_invalidates(self):
+        """Test saving a company serializes it again."""
+        fragments.fragments([self.company.pk])
+
+        self.company.company_name = 'Renamed'
+        self.company.save()
+
+        fragment = fragments.fragments([self.company.pk])[self.company.pk]
+        self.assertEqual(fragment['company_name'], 'Renamed')
+
+    def test_card_change_invalidates(self):
+        """Test adding or deleting a card serializes the company again."""
+        fragments.fragments([self.company.pk])
+
+        Card.objects.create(
+            company=self.company, title='Second', points_needed=5)
+        fragment = fragments.fragments([self.company.pk])[self.company.pk]
+        self.assertEqual(len(fragment['card']), 2)
+
+        self.card.delete()
+        fragment = fragments.fragments([self.company.pk])[self.company.pk]
+        self.assertEqual(len(fragment['card']), 1)
+
+    def test_logo_change_invalidates(self):
+        """Test adding a logo serializes the company again."""
+        fragments.fragments([self.company.pk])
+
+        CompanyLogo.objects.create(company=self.company, logo='logo.jpg')
+
+        fragment = fragments.fragments([self.company.pk])[self.company.pk]
+        self.assertTrue(fragment['image']['logo'].endswith('logo.jpg'))
+
+    @override_settings(ALLOWED_HOSTS=['one.example.com', 'two.example.com'])
+    def test_logo_url_absolute_for_request(self):
+        """Test the logo URL is built for the request, not cached so."""
+        CompanyLogo.objects.create(company=self.company, logo='logo.jpg')
+        request = RequestFactory().get('/', HTTP_HOST='one.example.com')
+
+        fragment = fragments.fragments(
+            [self.company.pk], request)[self.company.pk]
+        self.assertTrue(fragment['image']['logo'].startswith(
+            'http://one.example.com/'))
+
+        request = RequestFactory().get('/', HTTP_HOST='two.example.com')
+        fragment = fragments.fragments(
+            [self.company.pk], request)[self.company.pk]
+        self.assertTrue(fragment['image']['logo'].startswith(
+            'http://two.example.com/'))
+
+    def test_versions_expire(self):
+        """Test a process that missed a bump moves on once it expires."""
+        version = fragments.catalogue_version()
+        later = time.time() + settings.CACHES['catalogue']['TIMEOUT'] + 1
+
+        with patch('django.core.cache.backends.locmem.time.time',
+                   return_value=later):
+            self.assertNotEqual(fragments.catalogue_version(), version)
+
+    def test_evicted_version_not_reused(self):
+        """Test losing a version counter does not serve a stale fragment."""
+        fragments.fragments([self.company.pk])
+        fragments.get_cache().delete(fragments.version_key(self.company.pk))
+        Card.objects.filter(pk=self.card.pk).update(title='Renamed')
+
+        fragment = fragments.fragments([self.company.pk])[self.company.pk]
+        self.assertEqual(fragment['card'][0]['title'], 'Renamed')
@@ -1,70 +1,96 @@
 """Views for the company APIs."""
 
+import hashlib
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.authentication import CachedTokenAuthentication
+from core.conditional import ConditionalGetMixin
 from core.models import Company, CompanyLogo
-from company import serializers
-
-
-from geopy.distance import great_circle
-import requests
+from core import distance, geo, location
+from company import fragments, pagination, serializers
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """View for manage card APIs."""
 
     serializer_class = serializers.CompanyDetailSerializer
     queryset = Company.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Retrieve cards for authenticated user."""
         return self.queryset.filter(user=self.request.user).order_by('-id')
 
+    def get_origin(self):
+        """Return where the request comes from, resolving it once."""
+        if not hasattr(self, 'origin'):
+            self.origin = location.resolve(self.request)
+
+        return self.origin
+
+    def get_conditional_state(self):
+        """
+        Make the list depend on the catalogue version, bumped with every
+        company, card and logo, rather than scan all of them.
+        """
+        if self.action != 'list':
+            return super().get_conditional_state()
+
+        key = repr((self.get_conditional_key(),
+                    fragments.catalogue_version()))
+
+        return '"%s"' % hashlib.sha1(key.encode()).hexdigest(), None
+
+    def get_conditional_key(self):
+        """Make the list depend on where the request comes from."""
+        if self.action != 'list':
+            return super().get_conditional_key()
+
+        return (super().get_conditional_key(), self.get_origin())
+
     def list(self, request, pk=None):
-        """Return the serrializer class for request."""
-        # Get IP info once
-        ip_info = requests.get(
-            'https://api64.ipify.org?format=json').json()
-        ip_address = ip_info["ip"]
-        response = requests.get(
-            f'http://api.ipstack.com/{ip_address}?access_key='
-            '8eba29fcae0bbc63c1e93b8c370e4bcf').json()
-        latitude = response.get("latitude")
-        longitude = response.get("longitude")
-
-        if response['success'] is False:
-            first = (51.633789, -0.125860)
-            print('''
-            IMPORTANT:
-            usage_limit_reached
-            Your monthly usage limit has been reached
-            Please upgrade your Subscription Plan
-            http://api.ipstack.com/
-            ''')
+        """List the companies nearest to the shopper, one page at a time."""
+        return self.conditional_response(
+            request, lambda: self.nearest(request))
+
+    def nearest(self, request):
+        """Return the page of companies nearest to the request."""
+        first = self.get_origin()
+        paginator = pagination.DistanceCursorPagination(request)
+        # Rank one company past the page to know if there is a next one
+        if paginator.radius is not None:
+            ranked = [
+                (miles, company.id) for miles, company in geo.nearby(
+                    Company.objects.all(), first,
+                    radius=paginator.radius,
+                    limit=paginator.limit + 1,
+                    after=paginator.after,
+                )
+            ]
         else:
-            first = (float(latitude), float(longitude))
-        # Calculate distances for all companies
-        # and pass them as a context to our serializer
-        companies = Company.objects.all()
-        distances = {}
-        for company in companies:
-            second = (company.lat, company.long)
-            distance = great_circle(first, second).miles
-            distances[company.id] = distance
-
-        # Sort by distance
-        companies_processed = serializers.CompanySerializer(
-            companies, many=True, context={'distances': distances}).data
-        companies_processed.sort(key=lambda x: x['distance'])
-
-        return Response(companies_processed, status=status.HTTP_200_OK)
+            # Companies changed in other processes are reloaded first, so
+            # the page matches the catalogue version of its ETag
+            distance.companies.ensure_version(fragments.locations_version())
+            ids, miles = distance.companies.nearest(
+                first, limit=paginator.limit + 1, after=paginator.after)
+            ranked = list(zip(miles.tolist(), ids.tolist()))
+        page = paginator.paginate(ranked)
+
+        # Only the companies changed since they were cached are serialized
+        companies = fragments.fragments(
+            [pk for miles, pk in page], request)
+        companies_processed = [
+            dict(companies[pk], distance=miles)
+            for miles, pk in page if pk in companies
+        ]
+
+        return paginator.get_paginated_response(companies_processed)
 
     def perform_create(self, serializer):
         """Create a new recipe."""
@@ -79,7 +105,7 @@ class CompanyLogoViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.CompanyImageSerializer
     queryset = CompanyLogo.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     parser_classes = (FormParser, MultiPartParser)
 
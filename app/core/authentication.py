@@ -0,0 +1,37 @@
+"""Authentication classes shared by the APIs."""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def cache_key(key):
+    """Return the cache key of an API token."""
+    return f'token:{key}'
+
+
+def forget(key):
+    """Drop an API token from the cache."""
+    caches[settings.TOKEN_CACHE_ALIAS].delete(cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication keeping each token with its user in the
+    TOKEN_CACHE_ALIAS cache instead of querying them on every request.
+    Cached users are checked to be active like freshly queried ones.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = caches[settings.TOKEN_CACHE_ALIAS]
+        token = cache.get(cache_key(key))
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key(key), token)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        return token.user, token
@@ -0,0 +1,114 @@
+"""Conditional GET support for the read endpoints."""
+
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin answering list and retrieve requests with 304 Not
+    Modified when the latest update time and the row count of what they
+    serialize still match the client's ETag, without loading the rows.
+    Last-Modified is only informative: unlike the ETag it misses deleted
+    rows, so If-Modified-Since alone never gets a 304.
+
+    The actions in conditional_page_actions instead fetch their rows and
+    derive the ETag from the serialized data, for reads cheaper to run
+    than to aggregate over every row they could show.
+    """
+
+    conditional_page_actions = ()
+
+    def get_conditional_queryset(self):
+        """Return the rows of the request, narrowed to the object if any."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+        return queryset
+
+    def get_conditional_querysets(self):
+        """Return the (queryset, time field) pairs a response depends on."""
+        return [(self.get_conditional_queryset(), 'updated')]
+
+    def get_conditional_key(self):
+        """Return what else than the rows a response depends on."""
+        return self.request.get_full_path()
+
+    def get_conditional_state(self):
+        """Return the ETag and last modification time of the response."""
+        states = [
+            queryset.order_by().aggregate(
+                modified=Max(field), count=Count('pk'))
+            for queryset, field in self.get_conditional_querysets()
+        ]
+        modified = [
+            state['modified'] for state in states
+            if state['modified'] is not None
+        ]
+        key = repr((self.get_conditional_key(), [
+            (state['modified'], state['count']) for state in states]))
+        etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+        return etag, max(modified) if modified else None
+
+    def get_page_etag(self, data):
+        """Return the ETag of a response from its serialized data."""
+        key = json.dumps(
+            [repr(self.get_conditional_key()), data], cls=JSONEncoder)
+
+        return '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+    def page_response(self, request, respond):
+        """
+        Return the response of respond, or 304 Not Modified when the
+        ETag of its data is the client's.
+        """
+        response = respond()
+        if response.status_code != 200:
+            return response
+
+        response['ETag'] = self.get_page_etag(response.data)
+        not_modified = get_conditional_response(
+            request, etag=response['ETag'], response=response)
+
+        return not_modified if not_modified is not None else response
+
+    def conditional_response(self, request, respond):
+        """
+        Return 304 Not Modified when the client's copy is current,
+        otherwise the response of respond with its validators.
+        """
+        if self.action in self.conditional_page_actions:
+            return self.page_response(request, respond)
+
+        etag, modified = self.get_conditional_state()
+        timestamp = int(modified.timestamp()) if modified else None
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        response = respond()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, lambda: super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs))
@@ -0,0 +1,170 @@
+"""Vectorized distance engine for ranking companies."""
+
+import threading
+import time
+
+import numpy as np
+
+from django.conf import settings
+from geopy import distance
+
+
+EARTH_RADIUS_MILES = distance.EARTH_RADIUS / 1.609344
+
+
+def haversine(lat, long, lats, longs):
+    """Return the distances in miles from a point to arrays of points."""
+    lat = np.radians(lat)
+    long = np.radians(long)
+    lats = np.radians(lats)
+    longs = np.radians(longs)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def top(ids, distances, limit=None):
+    """Return ids and distances sorted by (distance, id), cut at limit."""
+    if limit is not None and limit < len(distances):
+        nearest = np.argpartition(distances, limit - 1)[:limit]
+        # Keep every row tied with the k-th distance so ties break on id.
+        kth = distances[nearest].max()
+        nearest = np.flatnonzero(distances <= kth)
+        ids = ids[nearest]
+        distances = distances[nearest]
+    order = np.lexsort((ids, distances))[:limit]
+
+    return ids[order], distances[order]
+
+
+class CompanyIndex:
+    """
+    In-process copy of every company's coordinates kept in float64
+    arrays, updated in place when companies are saved or deleted.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.loaded_at = None
+        self.version = None
+        self.size = 0
+        self.ids = np.empty(0, dtype=np.int64)
+        self.lats = np.empty(0, dtype=np.float64)
+        self.longs = np.empty(0, dtype=np.float64)
+        self.positions = {}
+
+    def load(self, rows):
+        """Replace the index with (id, lat, long) rows."""
+        rows = [
+            row for row in rows if row[1] is not None and row[2] is not None
+        ]
+        with self.lock:
+            self.size = len(rows)
+            self.ids = np.array(
+                [row[0] for row in rows], dtype=np.int64)
+            self.lats = np.array(
+                [row[1] for row in rows], dtype=np.float64)
+            self.longs = np.array(
+                [row[2] for row in rows], dtype=np.float64)
+            self.positions = {pk: i for i, pk in enumerate(self.ids.tolist())}
+            self.loaded_at = time.monotonic()
+
+    def refresh(self):
+        """Load every company from the database."""
+        from core.models import Company
+
+        self.load(Company.objects.values_list('id', 'lat', 'long'))
+
+    def ensure_loaded(self):
+        """Load the index on first use or once it is older than max_age."""
+        max_age = self.max_age
+        if max_age is None:
+            max_age = settings.COMPANY_INDEX_MAX_AGE
+        if self.loaded_at is None or \
+                time.monotonic() - self.loaded_at > max_age:
+            self.refresh()
+
+    def ensure_version(self, version):
+        """
+        Reload the index unless it was loaded at version, the counter
+        of company changes read before the reload.
+        """
+        if self.version != version:
+            self.refresh()
+            self.version = version
+
+    def _grow(self):
+        """Double the capacity of the arrays."""
+        capacity = max(2 * len(self.ids), 16)
+        for name in ('ids', 'lats', 'longs'):
+            array = getattr(self, name)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            setattr(self, name, grown)
+
+    def update(self, pk, lat, long):
+        """Insert or move a single company."""
+        if self.loaded_at is None:
+            return
+        if lat is None or long is None:
+            self.remove(pk)
+            return
+        with self.lock:
+            position = self.positions.get(pk)
+            if position is None:
+                if self.size == len(self.ids):
+                    self._grow()
+                position = self.size
+                self.size += 1
+                self.positions[pk] = position
+                self.ids[position] = pk
+            self.lats[position] = lat
+            self.longs[position] = long
+
+    def remove(self, pk):
+        """Drop a single company, moving the last row into its slot."""
+        with self.lock:
+            position = self.positions.pop(pk, None)
+            if position is None:
+                return
+            last = self.size - 1
+            if position != last:
+                moved = int(self.ids[last])
+                self.ids[position] = moved
+                self.lats[position] = self.lats[last]
+                self.longs[position] = self.longs[last]
+                self.positions[moved] = position
+            self.size = last
+
+    def nearest(self, origin, limit=None, radius=None, after=None):
+        """
+        Return the ids and distances in miles of the companies nearest
+        to origin, sorted by (distance, id) and starting after the
+        (distance, id) of the last company already returned.
+        """
+        self.ensure_loaded()
+        with self.lock:
+            ids = self.ids[:self.size].copy()
+            distances = haversine(
+                origin[0], origin[1],
+                self.lats[:self.size], self.longs[:self.size],
+            )
+        if radius is not None:
+            inside = distances <= radius
+            ids = ids[inside]
+            distances = distances[inside]
+        if after is not None:
+            last_distance, last_id = after
+            later = (distances > last_distance) | (
+                (distances == last_distance) & (ids > last_id))
+            ids = ids[later]
+            distances = distances[later]
+
+        return top(ids, distances, limit)
+
+
+companies = CompanyIndex()
@@ -0,0 +1,181 @@
+"""Geohash spatial index helpers for nearest-company search."""
+
+import math
+
+from django.db.models import Q
+from geopy.distance import great_circle
+
+from core import distance
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+SEARCH_PRECISION = 7
+MILES_PER_DEGREE = great_circle((0, 0), (1, 0)).miles
+
+
+def encode(lat, long, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    long_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        value, interval = (long, long_range) if even else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """Return the (lat, long) size in degrees of a cell."""
+    lat_bits = (5 * precision) // 2
+    long_bits = 5 * precision - lat_bits
+
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** long_bits
+
+
+def neighbours(lat, long, precision):
+    """Return the cell holding a point plus its eight neighbours."""
+    lat_size, long_size = cell_size(precision)
+    cells = set()
+    for d_lat in (-1, 0, 1):
+        for d_long in (-1, 0, 1):
+            n_lat = min(max(lat + d_lat * lat_size, -90.0), 90.0)
+            n_long = (long + d_long * long_size + 180.0) % 360.0 - 180.0
+            cells.add(encode(n_lat, n_long, precision))
+
+    return cells
+
+
+def covered_radius(lat, precision):
+    """
+    Return the radius in miles guaranteed to be covered by the
+    neighbourhood of a cell at the given precision.
+    """
+    lat_size, long_size = cell_size(precision)
+    edge_lat = min(abs(lat) + lat_size, 90.0)
+    long_miles = long_size * MILES_PER_DEGREE * math.cos(
+        math.radians(edge_lat))
+
+    return min(lat_size * MILES_PER_DEGREE, long_miles)
+
+
+def precision_for_radius(lat, radius):
+    """Return the finest precision whose neighbourhood covers radius."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if covered_radius(lat, precision) >= radius:
+            return precision
+
+    return 0
+
+
+def bounding_box(origin, radius):
+    """
+    Return the (min, max) latitude and longitude ranges holding every
+    point within radius miles of origin, with no longitude range when
+    the circle reaches a pole or crosses the antimeridian.
+    """
+    angle = radius / MILES_PER_DEGREE
+    lat_range = (max(origin[0] - angle, -90.0), min(origin[0] + angle, 90.0))
+    ratio = math.sin(math.radians(angle)) / math.cos(math.radians(origin[0]))
+    if angle >= 90.0 or ratio >= 1.0:
+        return lat_range, None
+    long_angle = math.degrees(math.asin(ratio))
+    long_range = (origin[1] - long_angle, origin[1] + long_angle)
+    if long_range[0] < -180.0 or long_range[1] > 180.0:
+        return lat_range, None
+
+    return lat_range, long_range
+
+
+def within_box(queryset, origin, radius):
+    """Return the rows of queryset inside the bounding box of a circle."""
+    lat_range, long_range = bounding_box(origin, radius)
+    queryset = queryset.filter(lat__range=lat_range)
+    if long_range is not None:
+        queryset = queryset.filter(long__range=long_range)
+
+    return queryset
+
+
+def candidates(queryset, origin, precision):
+    """Return the rows of queryset in the neighbourhood of origin."""
+    if precision == 0:
+        return list(queryset)
+    query = Q()
+    for cell in neighbours(origin[0], origin[1], precision):
+        query |= Q(geohash__startswith=cell)
+
+    return list(queryset.filter(query))
+
+
+def rank(rows, origin):
+    """Return (distance, row) pairs sorted by distance from origin."""
+    distances = distance.haversine(
+        origin[0], origin[1],
+        [row.lat for row in rows],
+        [row.long for row in rows],
+    )
+    ranked = list(zip(distances.tolist(), rows))
+    ranked.sort(key=lambda pair: (pair[0], pair[1].pk))
+
+    return ranked
+
+
+def nearby(queryset, origin, radius=None, limit=None, after=None):
+    """
+    Return (distance, row) pairs sorted by distance from origin,
+    restricted to rows within radius miles, starting after the
+    (distance, id) of the last row already returned and cut at limit.
+
+    Only the rows in the geohash cells around origin and in the bounding
+    box of the searched circle are fetched; the search widens to coarser
+    cells until the requested rows are known to be found.
+    """
+    queryset = queryset.exclude(geohash='')
+
+    def wanted(ranked, within=None):
+        return [
+            pair for pair in ranked
+            if (within is None or pair[0] <= within)
+            and (after is None or (pair[0], pair[1].pk) > after)
+        ]
+
+    if radius is not None:
+        precision = min(
+            precision_for_radius(origin[0], radius), SEARCH_PRECISION)
+        ranked = wanted(rank(candidates(
+            within_box(queryset, origin, radius), origin, precision),
+            origin), radius)
+        return ranked[:limit] if limit else ranked
+
+    if not limit:
+        return wanted(rank(list(queryset), origin))
+
+    for precision in range(SEARCH_PRECISION, -1, -1):
+        if precision == 0:
+            ranked = rank(candidates(queryset, origin, precision), origin)
+            return wanted(ranked)[:limit]
+        covered = covered_radius(origin[0], precision)
+        ranked = rank(candidates(
+            within_box(queryset, origin, covered), origin, precision),
+            origin)
+        inside = wanted(ranked, covered)
+        if len(inside) >= limit:
+            return inside[:limit]
@@ -0,0 +1,134 @@
+"""Post code geocoding behind an in-process LRU and a database cache."""
+
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from geopy.geocoders import Nominatim
+
+from core import metrics, timing
+
+
+# Where the stub backend scatters post codes, in degrees around a centre.
+STUB_CENTRE = (51.5074, -0.1278)
+STUB_SPREAD = 0.05
+
+counters = Counter()
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalize(post_code):
+    """Return the post code without spaces and in upper case."""
+    return ''.join(post_code.split()).upper()
+
+
+def remember(key, point):
+    """Keep a point in the in-process LRU."""
+    with _lock:
+        _memory[key] = point
+        _memory.move_to_end(key)
+        while len(_memory) > settings.GEOCODE_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def clear():
+    """Empty the in-process LRU and reset the counters."""
+    with _lock:
+        _memory.clear()
+        counters.clear()
+
+
+def nominatim(post_code):
+    """Ask Nominatim for the (lat, long) of a post code."""
+    geolocator = Nominatim(user_agent="home")
+    location = geolocator.geocode(post_code)
+    if location is None:
+        return None
+
+    return (location.latitude, location.longitude)
+
+
+def gazetteer(post_code):
+    """Return the (lat, long) of a post code from the offline gazetteer."""
+    from core.models import PostcodeCentroid
+
+    return PostcodeCentroid.objects.filter(
+        post_code=normalize(post_code)).values_list('lat', 'long').first()
+
+
+def stub(post_code):
+    """Return a made-up point near STUB_CENTRE, the same for a post code."""
+    digest = hashlib.blake2b(
+        normalize(post_code).encode(), digest_size=4).digest()
+    lat = int.from_bytes(digest[:2], 'big') / 0xffff * 2 - 1
+    long = int.from_bytes(digest[2:], 'big') / 0xffff * 2 - 1
+
+    return (STUB_CENTRE[0] + lat * STUB_SPREAD,
+            STUB_CENTRE[1] + long * STUB_SPREAD)
+
+
+BACKENDS = {
+    'nominatim': nominatim,
+    'gazetteer': gazetteer,
+    'stub': stub,
+}
+
+
+def geocode(post_code):
+    """Ask the configured geocoding backend for a post code."""
+    with timing.timed('geocode'):
+        return BACKENDS[settings.GEOCODER_BACKEND](post_code)
+
+
+def lookup(post_code):
+    """Return the (lat, long) of a post code, or None if it is unknown."""
+    from core.models import GeocodeCache
+
+    key = normalize(post_code)
+    with _lock:
+        point = _memory.get(key)
+        if point is not None:
+            _memory.move_to_end(key)
+    if point is not None:
+        counters['memory_hits'] += 1
+        metrics.inc('geocode_lookups_total', result='memory_hit')
+        return point
+
+    point = GeocodeCache.objects.filter(
+        post_code=key).values_list('lat', 'long').first()
+    if point is not None:
+        counters['db_hits'] += 1
+        metrics.inc('geocode_lookups_total', result='db_hit')
+        remember(key, point)
+        return point
+
+    counters['misses'] += 1
+    metrics.inc('geocode_lookups_total', result='miss')
+    point = geocode(post_code)
+    if point is None:
+        return None
+    try:
+        with transaction.atomic():
+            GeocodeCache.objects.create(
+                post_code=key, lat=point[0], long=point[1])
+    except IntegrityError:
+        # Another request cached the same post code meanwhile.
+        pass
+    remember(key, point)
+
+    return point
+
+
+def stats():
+    """Return the hit and miss counters with the overall hit ratio."""
+    result = {
+        name: counters[name] for name in ('memory_hits', 'db_hits', 'misses')
+    }
+    total = sum(result.values())
+    hits = result['memory_hits'] + result['db_hits']
+    result['hit_ratio'] = hits / total if total else 0.0
+
+    return result
@@ -0,0 +1,136 @@
+"""Append-only points ledger compacted into per-card balances."""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def append(events):
+    """Write point events in a single batched insert."""
+    from core.models import PointEvent
+
+    return PointEvent.objects.bulk_create(
+        events, batch_size=settings.POINT_EVENT_BATCH_SIZE)
+
+
+def accrual(mycards_id, points, points_needed, receipt_id=None):
+    """
+    Return the events of a receipt point which left points on the card,
+    with the redemption of the card when it was completed.
+    """
+    from core.models import PointEvent
+
+    events = [PointEvent(
+        mycards_id=mycards_id, kind=PointEvent.ACCRUAL, delta=1,
+        receipt_id=receipt_id)]
+    if points == 0:
+        events.append(PointEvent(
+            mycards_id=mycards_id, kind=PointEvent.REDEMPTION,
+            delta=-points_needed, receipt_id=receipt_id))
+
+    return events
+
+
+def with_balance(queryset):
+    """
+    Annotate cards with their balance: the compacted snapshot plus the
+    events appended since.
+    """
+    from core.models import PointEvent
+
+    tail = PointEvent.objects.filter(
+        mycards=OuterRef('pk'),
+        id__gt=Coalesce(OuterRef('pointbalance__last_event_id'), 0),
+    ).order_by().values('mycards').annotate(
+        delta=Sum('delta')).values('delta')
+
+    return queryset.annotate(balance=(
+        Coalesce('pointbalance__balance', 0) + Coalesce(Subquery(tail), 0)))
+
+
+def balance(mycards_id):
+    """Return the compacted balance of a card plus its newer events."""
+    from core.models import MyCards
+
+    total = with_balance(MyCards.objects.filter(pk=mycards_id)).values_list(
+        'balance', flat=True).first()
+
+    return total or 0
+
+
+def add_point(mycards_id, points_needed, receipt_id=None):
+    """
+    Append a receipt point to a card, starting over from zero once
+    points_needed is reached, and return the points on the card, or
+    None without the card. The card row is locked but not written, so
+    the events of a card are appended in id order; call it within a
+    transaction.
+    """
+    from core.models import MyCards
+
+    total = with_balance(
+        MyCards.objects.select_for_update(of=('self',)).filter(
+            pk=mycards_id)).values_list('balance', flat=True).first()
+    if total is None:
+        return None
+    points = total + 1 if total + 1 < points_needed else 0
+    append(accrual(mycards_id, points, points_needed, receipt_id))
+
+    return points
+
+
+def compact(lag=None):
+    """
+    Fold the events older than lag seconds into the card balances and
+    return the number of balances written. Each balance keeps the id of
+    the last event it folded: the events of a card are appended while
+    its MyCards row is locked, so they commit in id order, and events
+    committed late by other cards are still past their own card's mark.
+    """
+    from core.models import PointBalance, PointEvent
+
+    if lag is None:
+        lag = settings.POINT_COMPACTION_LAG
+    now = timezone.now()
+    cutoff = now - datetime.timedelta(seconds=lag)
+
+    with transaction.atomic():
+        events = PointEvent.objects.filter(created__lte=cutoff).filter(
+            Q(mycards__pointbalance__isnull=True)
+            | Q(id__gt=F('mycards__pointbalance__last_event_id')))
+        # Only look a further lag behind the previous run's cutoff, for
+        # the events that were not committed yet when it ran.
+        previous = PointBalance.objects.aggregate(
+            updated=Max('updated'))['updated']
+        if previous is not None:
+            events = events.filter(
+                created__gt=previous - datetime.timedelta(seconds=2 * lag))
+        folded = {
+            row['mycards_id']: (row['delta'], row['high'])
+            for row in events.values('mycards_id').annotate(
+                delta=Sum('delta'), high=Max('id')).order_by()
+        }
+        if not folded:
+            return 0
+
+        balances = PointBalance.objects.select_for_update().in_bulk(
+            list(folded))
+        for balance in balances.values():
+            delta, high = folded[balance.pk]
+            balance.balance += delta
+            balance.last_event_id = high
+            balance.updated = now
+        PointBalance.objects.bulk_update(
+            balances.values(), ['balance', 'last_event_id', 'updated'])
+        PointBalance.objects.bulk_create([
+            PointBalance(mycards_id=mycards_id, balance=delta,
+                         last_event_id=high, updated=now)
+            for mycards_id, (delta, high) in folded.items()
+            if mycards_id not in balances
+        ])
+
+    return len(folded)
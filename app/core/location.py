@@ -0,0 +1,158 @@
+"""Resolve where a request comes from without blocking on the network."""
+
+import functools
+import ipaddress
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+from core import profiles, timing
+from core.models import GeoIPRange, Shopper
+
+
+logger = logging.getLogger(__name__)
+
+_ip_cache = OrderedDict()
+_ip_lock = threading.Lock()
+
+
+class RemoteLookupError(Exception):
+    """The remote GeoIP service did not answer."""
+
+
+def parse_point(lat, long):
+    """Return (lat, long) as floats or None if they are not a point."""
+    try:
+        point = (float(lat), float(long))
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+        return None
+
+    return point
+
+
+def from_query(request):
+    """Return the point sent by the client as lat/lng parameters."""
+    return parse_point(
+        request.query_params.get('lat'), request.query_params.get('lng'))
+
+
+def from_shopper(user):
+    """
+    Return the stored point of the authenticated shopper, the one its
+    profile resolves to.
+    """
+    shopper_id = profiles.for_user(user).shopper_id
+    if shopper_id is None:
+        return None
+    coordinates = Shopper.objects.filter(pk=shopper_id).values_list(
+        'lat', 'long').first()
+
+    return parse_point(*coordinates) if coordinates else None
+
+
+def client_ip(request):
+    """Return the address of the client the request comes from."""
+    return request.META.get('REMOTE_ADDR')
+
+
+@functools.lru_cache(maxsize=1)
+def session():
+    """Return the pooled session used for remote IP lookups."""
+    pooled = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=settings.GEOIP_REMOTE_POOL_SIZE)
+    pooled.mount('http://', adapter)
+    pooled.mount('https://', adapter)
+
+    return pooled
+
+
+def from_remote(ip):
+    """
+    Return the point the configured remote service gives for ip, raising
+    RemoteLookupError when it times out or fails.
+    """
+    try:
+        with timing.timed('http'):
+            response = session().get(
+                settings.GEOIP_REMOTE_URL.format(ip=ip),
+                timeout=settings.GEOIP_REMOTE_TIMEOUT,
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (requests.RequestException, ValueError) as error:
+        logger.warning('Remote GeoIP lookup failed for %s', ip)
+        raise RemoteLookupError(ip) from error
+
+    return parse_point(data.get('latitude'), data.get('longitude'))
+
+
+def locate_ip(ip):
+    """Return the point of ip from the offline table or remote service."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    if not address.is_global:
+        return None
+
+    number = int(address)
+    block = GeoIPRange.objects.filter(
+        first_ip__lte=number).order_by('-first_ip').first()
+    if block is not None and block.last_ip >= number:
+        return (block.lat, block.long)
+    if settings.GEOIP_REMOTE_URL:
+        return from_remote(ip)
+
+    return None
+
+
+def from_ip(ip):
+    """
+    Return the point of ip, kept GEOIP_CACHE_TTL seconds in this process.
+    Failed remote lookups are not kept, so the next request retries.
+    """
+    now = time.monotonic()
+    with _ip_lock:
+        entry = _ip_cache.get(ip)
+        if entry is not None and entry[0] > now:
+            _ip_cache.move_to_end(ip)
+            return entry[1]
+
+    try:
+        point = locate_ip(ip)
+    except RemoteLookupError:
+        return None
+    with _ip_lock:
+        _ip_cache[ip] = (now + settings.GEOIP_CACHE_TTL, point)
+        _ip_cache.move_to_end(ip)
+        while len(_ip_cache) > settings.GEOIP_CACHE_SIZE:
+            _ip_cache.popitem(last=False)
+
+    return point
+
+
+def clear():
+    """Forget the located addresses, after the range table changed."""
+    with _ip_lock:
+        _ip_cache.clear()
+
+
+def resolve(request):
+    """
+    Return the (lat, long) of a request, trying the lat/lng parameters,
+    then the shopper's stored location, then the client IP.
+    """
+    return (
+        from_query(request)
+        or from_shopper(request.user)
+        or from_ip(client_ip(request))
+        or settings.DEFAULT_LOCATION
+    )
@@ -0,0 +1,71 @@
+"""
+Django command comparing the geopy loop with the vectorized
+distance engine.
+"""
+
+import time
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+from geopy.distance import great_circle
+
+from core import distance
+
+
+class Command(BaseCommand):
+    """Benchmark company ranking at several company counts."""
+
+    help = 'Compare geopy great_circle with the vectorized haversine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[1000, 100000, 1000000],
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def best_of(self, repeat, func):
+        """Return the best wall time in milliseconds of func."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings) * 1000
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = np.random.default_rng(0)
+        origin = (51.633789, -0.125860)
+        limit = options['limit']
+        self.stdout.write(
+            f'{"companies":>10} {"geopy ms":>10} '
+            f'{"numpy ms":>10} {"speedup":>8}')
+
+        for size in options['sizes']:
+            lats = rng.uniform(49.9, 58.6, size)
+            longs = rng.uniform(-8.2, 1.8, size)
+            # The database hands the coordinates over as strings.
+            rows = [
+                (pk, str(lat), str(long))
+                for pk, lat, long in zip(range(size), lats, longs)
+            ]
+            index = distance.CompanyIndex(max_age=float('inf'))
+            index.load(rows)
+
+            def geopy_loop():
+                distances = {}
+                for pk, lat, long in rows:
+                    distances[pk] = great_circle(origin, (lat, long)).miles
+                return sorted(distances.items(), key=lambda x: x[1])[:limit]
+
+            geopy_ms = self.best_of(
+                1 if size > 100000 else options['repeat'], geopy_loop)
+            numpy_ms = self.best_of(
+                options['repeat'], lambda: index.nearest(origin, limit))
+            self.stdout.write(
+                f'{size:>10} {geopy_ms:>10.1f} {numpy_ms:>10.2f} '
+                f'{geopy_ms / numpy_ms:>7.0f}x')
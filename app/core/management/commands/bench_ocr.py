@@ -0,0 +1,83 @@
+"""
+Django command comparing receipt OCR with and without preprocessing.
+"""
+
+import difflib
+import io
+import time
+
+import pytesseract
+from PIL import Image
+
+from django.core.management.base import BaseCommand
+
+from core.management.commands import creating
+from receipt import preprocessing
+
+
+RECEIPT = '''Company Sample
+12 High Street
+01/02/2023 10:11:12
+Flat white      2.80
+Croissant       2.20
+Total           5.00'''
+
+
+def photo(scale):
+    """Return a synthetic receipt blown up to phone photo size."""
+    image = Image.open(creating.create_image(RECEIPT, 'receipt.jpg'))
+    image = image.resize(
+        (image.width * scale, image.height * scale), Image.BICUBIC)
+    buffer = io.BytesIO()
+    image.save(buffer, 'jpeg', quality=90)
+    buffer.seek(0)
+
+    return buffer
+
+
+def accuracy(text):
+    """Return how close the OCR text is to the printed receipt."""
+    words = ' '.join(text.split())
+
+    expected = ' '.join(RECEIPT.split())
+
+    return difflib.SequenceMatcher(None, expected, words).ratio()
+
+
+class Command(BaseCommand):
+    """Benchmark the OCR of synthetic receipts."""
+
+    help = 'Compare receipt OCR latency and accuracy with preprocessing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', nargs='+', type=int,
+                            default=[1, 4, 12])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def measure(self, buffer, prepare):
+        """Return the best latency in ms and the accuracy of one OCR."""
+        timings = []
+        for _ in range(self.repeat):
+            buffer.seek(0)
+            start = time.perf_counter()
+            text = pytesseract.image_to_string(prepare(buffer))
+            timings.append(time.perf_counter() - start)
+
+        return min(timings) * 1000, accuracy(text)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.repeat = options['repeat']
+        self.stdout.write(
+            f'{"size":>11} {"raw ms":>8} {"raw acc":>8} '
+            f'{"prep ms":>8} {"prep acc":>8}')
+
+        for scale in options['scales']:
+            buffer = photo(scale)
+            size = 'x'.join(str(side) for side in Image.open(buffer).size)
+            raw_ms, raw_accuracy = self.measure(buffer, Image.open)
+            prep_ms, prep_accuracy = self.measure(
+                buffer, preprocessing.prepare)
+            self.stdout.write(
+                f'{size:>11} {raw_ms:>8.0f} {raw_accuracy:>8.2f} '
+                f'{prep_ms:>8.0f} {prep_accuracy:>8.2f}')
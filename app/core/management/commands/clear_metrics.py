@@ -0,0 +1,23 @@
+"""
+Django command to remove the metric files left by the previous run of
+this service, run before the service starts its processes.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+
+class Command(BaseCommand):
+    """Clear the metrics directory of this service."""
+
+    help = 'Remove the metric files of the previous run of this service.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not settings.METRICS_DIR:
+            return
+        metrics.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Cleared {metrics.service_dir()}.'))
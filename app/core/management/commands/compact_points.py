@@ -0,0 +1,24 @@
+"""
+Django command to fold the point events into the card balances.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core import ledger
+
+
+class Command(BaseCommand):
+    """Compact the points ledger."""
+
+    help = 'Fold the point events into the card balances.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag', type=int, default=None,
+            help='Leave events younger than this many seconds.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        total = ledger.compact(lag=options['lag'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Compacted {total} card balances.'))
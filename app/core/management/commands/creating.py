@@ -1,10 +1,14 @@
 """Commands to create different objects"""
 
+from core import geo
 from core.models import Company, Card, MyCards, Shopper, CompanyLogo
 from django.contrib.auth import get_user_model
 
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, PngImagePlugin
 
+from receipt.ocr import STUB_TEXT_KEY
+
+import io
 import tempfile
 
 
@@ -78,6 +82,23 @@ def create_image(content, name):
     return image_file
 
 
+def create_receipt(content, scale=3):
+    """
+    Return the PNG bytes of a receipt showing a text, blown up for
+    tesseract, which also carries the text for the stub OCR.
+    """
+    canva = Image.new('RGB', (350, 150), color='white')
+    image = ImageDraw.Draw(canva)
+    image.text((10, 10), content, fill=(0, 0, 0))
+    canva = canva.resize((350 * scale, 150 * scale), Image.BICUBIC)
+    metadata = PngImagePlugin.PngInfo()
+    metadata.add_text(STUB_TEXT_KEY, content)
+    buffer = io.BytesIO()
+    canva.save(buffer, 'png', pnginfo=metadata)
+
+    return buffer.getvalue()
+
+
 def create_mycards(shopper, card, image, points=1):
     """Create and return a new MyCards objects."""
     print(image)
@@ -88,3 +109,39 @@ def create_mycards(shopper, card, image, points=1):
 def create_logo(company, **params):
     """Create and return a new CompanyLogo"""
     return CompanyLogo.objects.create(company=company, **params)
+
+
+def create_companies(user, coordinates, points_needed=10):
+    """
+    Create a company with a card at each (lat, long) in batches, without
+    geocoding them, and return the companies.
+    """
+    companies = []
+    for number, (lat, long) in enumerate(coordinates):
+        companies.append(Company(
+            user=user,
+            company_name=f'Company {number}',
+            address='Addres Sample',
+            city='City Sample',
+            post_code='n146hb',
+            country='GB',
+            phone_number='07518946014',
+            lat=lat,
+            long=long,
+            geohash=geo.encode(lat, long),
+        ))
+    Company.objects.bulk_create(companies, batch_size=500)
+    # Not every database returns the ids of bulk inserts.
+    companies = list(Company.objects.filter(user=user).order_by('-id')[
+        :len(companies)])
+    Card.objects.bulk_create([
+        Card(
+            company=company,
+            title='Sample card title',
+            description='Get a free coffee for every 10 coffee you buy',
+            points_needed=points_needed,
+        )
+        for company in companies
+    ], batch_size=500)
+
+    return companies
@@ -0,0 +1,57 @@
+"""
+Django command to load an offline GeoIP range table from a CSV file.
+"""
+
+import csv
+import ipaddress
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import location
+from core.models import GeoIPRange
+
+
+def ip_number(value):
+    """Return an address given as text or integer as an integer."""
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+
+    return int(ipaddress.ip_address(value))
+
+
+class Command(BaseCommand):
+    """Replace the GeoIP ranges with first_ip,last_ip,lat,long rows."""
+
+    help = 'Load GeoIP ranges from a first_ip,last_ip,lat,long CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options['batch_size']
+        total = 0
+        with open(options['path'], newline='') as source, \
+                transaction.atomic():
+            GeoIPRange.objects.all().delete()
+            batch = []
+            for row in csv.DictReader(source):
+                batch.append(GeoIPRange(
+                    first_ip=ip_number(row['first_ip']),
+                    last_ip=ip_number(row['last_ip']),
+                    lat=float(row['lat']),
+                    long=float(row['long']),
+                ))
+                if len(batch) == batch_size:
+                    GeoIPRange.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            GeoIPRange.objects.bulk_create(batch)
+            total += len(batch)
+        # Other processes pick the new ranges up within GEOIP_CACHE_TTL.
+        location.clear()
+
+        self.stdout.write(self.style.SUCCESS(f'Loaded {total} GeoIP ranges.'))
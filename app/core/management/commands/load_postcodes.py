@@ -0,0 +1,104 @@
+"""
+Django command to bulk load post code centroids from a CSV file.
+"""
+
+import csv
+import io
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.geocoding import normalize
+from core.models import PostcodeCentroid
+
+
+def read_centroids(source, post_code_column, lat_column, long_column):
+    """Yield normalized (post_code, lat, long) rows of a CSV file."""
+    for row in csv.DictReader(source):
+        post_code = normalize(row[post_code_column])
+        try:
+            lat = float(row[lat_column])
+            long = float(row[long_column])
+        except ValueError:
+            # Terminated post codes are published without a location.
+            continue
+        if post_code:
+            yield post_code, lat, long
+
+
+def batches(rows, size):
+    """Yield lists of at most size rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    """Load a post code gazetteer for the offline geocoder."""
+
+    help = 'Bulk load post code centroids from a CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--post-code-column', default='postcode')
+        parser.add_argument('--lat-column', default='latitude')
+        parser.add_argument('--long-column', default='longitude')
+
+    def copy_batch(self, cursor, batch):
+        """Upsert a batch through COPY into a temporary table."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        cursor.execute('TRUNCATE postcode_load')
+        cursor.copy_expert(
+            'COPY postcode_load (post_code, lat, long) FROM STDIN WITH CSV',
+            buffer,
+        )
+        cursor.execute(
+            f'INSERT INTO {PostcodeCentroid._meta.db_table} '
+            '(post_code, lat, long) '
+            'SELECT DISTINCT ON (post_code) post_code, lat, long '
+            'FROM postcode_load '
+            'ON CONFLICT (post_code) DO UPDATE '
+            'SET lat = EXCLUDED.lat, long = EXCLUDED.long'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        total = 0
+        with open(options['path'], newline='') as source, \
+                transaction.atomic():
+            rows = read_centroids(
+                source,
+                options['post_code_column'],
+                options['lat_column'],
+                options['long_column'],
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'CREATE TEMPORARY TABLE postcode_load '
+                        '(post_code varchar(10), lat double precision, '
+                        'long double precision) ON COMMIT DROP'
+                    )
+                    for batch in batches(rows, options['batch_size']):
+                        self.copy_batch(cursor.cursor, batch)
+                        total += len(batch)
+            else:
+                for batch in batches(rows, options['batch_size']):
+                    PostcodeCentroid.objects.bulk_create(
+                        [PostcodeCentroid(post_code=post_code, lat=lat,
+                                          long=long)
+                         for post_code, lat, long in batch],
+                        ignore_conflicts=True,
+                    )
+                    total += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Loaded {total} post code centroids.'))
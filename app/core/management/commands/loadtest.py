@@ -0,0 +1,303 @@
+"""
+Django command driving the whole shopper flow with concurrent clients
+and reporting the latency percentiles and throughput of every endpoint.
+
+Seed the companies with `manage.py seed_loadtest` first. Unless --url
+points at a running server, uwsgi is started against the configured
+database with geocoding and OCR stubbed or real as selected, and the
+receipts are processed inside its workers unless --celery leaves them
+to the running Celery workers.
+"""
+
+import asyncio
+import datetime
+import os
+import random
+import shutil
+import subprocess
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import geocoding
+from core.management.commands import creating
+from core.models import ReceiptJob
+
+
+PASSWORD = 'Loadtest123'
+STARTUP_TIMEOUT = 30
+# Upload to final job status of a receipt, reported without being a request.
+PROCESSED = 'receipt processed'
+
+
+class FlowError(Exception):
+    """A step of the flow did not get the answer it expects."""
+
+
+class Recorder:
+    """Latencies and failures of the requests, by endpoint."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+
+    def add(self, endpoint, seconds, ok=True):
+        """Record one request to an endpoint."""
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed):
+        """
+        Return (endpoint, requests, errors, requests/s, p50, p95, p99)
+        rows, with the percentiles in milliseconds.
+        """
+        rows = []
+        for endpoint, latencies in self.latencies.items():
+            p50, p95, p99 = np.percentile(
+                np.array(latencies) * 1000, [50, 95, 99])
+            rows.append((
+                endpoint, len(latencies), self.errors[endpoint],
+                len(latencies) / elapsed, p50, p95, p99,
+            ))
+
+        return rows
+
+
+def receipt_text(company_name):
+    """Return the text of a receipt never seen before from a company."""
+    moment = datetime.datetime(2000, 1, 1) + datetime.timedelta(
+        seconds=random.randrange(30 * 365 * 24 * 3600))
+    total = random.randrange(100, 100000) / 100
+
+    return (
+        f'{company_name}\n12 High Street\n'
+        f'{moment:%d/%m/%Y %H:%M:%S}\n'
+        f'Total {total:.2f}'
+    )
+
+
+class Shopper:
+    """
+    One virtual shopper signing up, enrolling in a card nearby and
+    uploading receipts until the card is completed.
+    """
+
+    def __init__(self, client, recorder, run, number, options):
+        self.client = client
+        self.recorder = recorder
+        self.email = f'loadtest-{run}-{number}@example.com'
+        self.options = options
+        self.rng = random.Random(f'{options["seed"]}-{number}')
+        self.headers = {}
+
+    async def call(self, endpoint, method, url, expected, **kwargs):
+        """Send a request timed under endpoint and return its data."""
+        began = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError as error:
+            self.recorder.add(endpoint, time.perf_counter() - began, False)
+            raise FlowError(f'{endpoint}: {type(error).__name__}')
+        ok = response.status_code in expected
+        self.recorder.add(endpoint, time.perf_counter() - began, ok)
+        if not ok:
+            raise FlowError(f'{endpoint}: HTTP {response.status_code}')
+
+        return response.json()
+
+    async def run(self):
+        """Go through the flow, raising FlowError at the first failure."""
+        credentials = {'email': self.email, 'password': PASSWORD}
+        await self.call('user create', 'POST', '/api/user/create/', (201,),
+                        json=dict(credentials, name='Load Test'))
+        token = await self.call(
+            'token', 'POST', '/api/user/token/', (200,), json=credentials)
+        self.headers = {'Authorization': f'Token {token["token"]}'}
+        shopper = await self.call(
+            'shopper create', 'POST', '/api/shopper/', (201,), json={
+                'first_name': 'Load',
+                'last_name': 'Test',
+                'address': 'Addres Sample',
+                'city': 'City Sample',
+                'post_code': self.options['post_code'],
+                'country': 'GB',
+                'phone_number': '07518946014',
+            })
+
+        companies = await self.call(
+            'company list', 'GET', '/api/company/', (200,))
+        cards = [
+            (company, card) for company in companies['results']
+            for card in company['card']
+        ]
+        if not cards:
+            raise FlowError('company list: no cards nearby')
+        company, card = self.rng.choice(cards)
+
+        mycards_url = f'/api/shopper/{shopper["id"]}/mycards/'
+        mycards = await self.call(
+            'mycards create', 'POST', mycards_url, (201,),
+            json={'shopper': shopper['id'], 'card': card['id']})
+        for _ in range(max(card['points_needed'] - mycards['points'], 1)):
+            await self.receipt(
+                f'{mycards_url}{mycards["id"]}/', company['company_name'])
+
+        history = await self.call(
+            'mycardshistory list', 'GET',
+            f'/api/shopper/{shopper["id"]}/mycardshistory/', (200,))
+        if not any(item['company'] == company['id']
+                   for item in history['results']):
+            raise FlowError('mycardshistory list: card not completed')
+
+    async def receipt(self, url, company_name):
+        """Upload a new receipt and wait until it earns its point."""
+        image = await asyncio.to_thread(
+            creating.create_receipt, receipt_text(company_name))
+        began = time.perf_counter()
+        job = await self.call(
+            'receipt upload', 'PUT', url, (200, 202),
+            files={'image': ('receipt.png', image, 'image/png')})
+        while job['status'] == ReceiptJob.PENDING:
+            if time.perf_counter() - began > self.options['timeout']:
+                self.recorder.add(
+                    PROCESSED, time.perf_counter() - began, False)
+                raise FlowError(f'{PROCESSED}: timed out')
+            await asyncio.sleep(self.options['poll_interval'])
+            job = await self.call(
+                'receipt job', 'GET', f'{url}jobs/{job["id"]}/', (200,))
+
+        ok = job['status'] == ReceiptJob.ACCEPTED
+        self.recorder.add(PROCESSED, time.perf_counter() - began, ok)
+        if not ok:
+            raise FlowError(f'{PROCESSED}: {job["status"]}')
+
+
+async def drive(url, options):
+    """
+    Run the flow for every shopper, at most concurrency at a time, and
+    return the recorder, the failures and the elapsed seconds.
+    """
+    recorder = Recorder()
+    failures = Counter()
+    semaphore = asyncio.Semaphore(options['concurrency'])
+    run = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=options['concurrency'])
+
+    async with httpx.AsyncClient(
+            base_url=url, timeout=options['timeout'],
+            limits=limits) as client:
+
+        async def flow(number):
+            async with semaphore:
+                shopper = Shopper(client, recorder, run, number, options)
+                try:
+                    await shopper.run()
+                except FlowError as error:
+                    failures[str(error)] += 1
+
+        began = time.perf_counter()
+        await asyncio.gather(*(flow(n) for n in range(options['users'])))
+        elapsed = time.perf_counter() - began
+
+    return recorder, failures, elapsed
+
+
+class Command(BaseCommand):
+    """Load test the shopper flow end to end."""
+
+    help = 'Report endpoint latency and throughput under concurrent shoppers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Server to drive instead of '
+                            'starting one.')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--geocoder', choices=sorted(geocoding.BACKENDS),
+                            default='stub')
+        parser.add_argument('--ocr', choices=['stub', 'tesseract'],
+                            default='stub')
+        parser.add_argument('--celery', action='store_true',
+                            help='Leave the receipts to the Celery workers.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument('--post-code', default='N14 6HB')
+        parser.add_argument('--poll-interval', type=float, default=0.1)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def serve(self, options):
+        """Start uwsgi with the selected backends and wait until it is up."""
+        if shutil.which('uwsgi') is None:
+            raise CommandError(
+                'uwsgi is not installed, start a server and pass --url.')
+        env = dict(
+            os.environ,
+            GEOCODER_BACKEND=options['geocoder'],
+            OCR_BACKEND=options['ocr'],
+            CELERY_TASK_ALWAYS_EAGER='0' if options['celery'] else '1',
+        )
+        address = f'127.0.0.1:{options["port"]}'
+        process = subprocess.Popen([
+            'uwsgi', '--http', address, '--module', 'app.wsgi',
+            '--master', '--workers', str(options['workers']),
+            '--enable-threads', '--die-on-term', '--disable-logging',
+        ], cwd=settings.BASE_DIR, env=env)
+
+        url = f'http://{address}'
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(
+                    f'uwsgi exited with code {process.returncode}.')
+            try:
+                httpx.get(url)
+                return process, url
+            except httpx.TransportError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'uwsgi did not answer on {address}.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        process = None
+        url = options['url']
+        if url is None:
+            process, url = self.serve(options)
+        else:
+            self.stderr.write(
+                'Driving a running server: its own geocoding, OCR and '
+                'Celery settings apply.')
+
+        try:
+            recorder, failures, elapsed = asyncio.run(drive(url, options))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+        self.stdout.write(
+            f'{"endpoint":<20} {"requests":>8} {"errors":>6} '
+            f'{"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        for endpoint, count, errors, rate, p50, p95, p99 in recorder.report(
+                elapsed):
+            self.stdout.write(
+                f'{endpoint:<20} {count:>8} {errors:>6} {rate:>8.1f} '
+                f'{p50:>8.1f} {p95:>8.1f} {p99:>8.1f}')
+
+        requests = sum(
+            len(latencies) for endpoint, latencies
+            in recorder.latencies.items() if endpoint != PROCESSED)
+        completed = options['users'] - sum(failures.values())
+        self.stdout.write(
+            f'{completed}/{options["users"]} flows completed in '
+            f'{elapsed:.1f}s, {requests / elapsed:.1f} req/s')
+        for reason, count in failures.most_common():
+            self.stdout.write(f'{count:>6} failed at {reason}')
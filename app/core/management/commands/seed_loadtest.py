@@ -0,0 +1,54 @@
+"""
+Django command seeding the companies and cards the load test shoppers
+enroll in.
+"""
+
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import geocoding
+from core.management.commands import creating
+
+
+OWNER_EMAIL = 'loadtest-owner@example.com'
+
+
+class Command(BaseCommand):
+    """Create companies with a card each scattered around a point."""
+
+    help = 'Seed companies with cards for the load test.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=200)
+        parser.add_argument('--points-needed', type=int, default=3)
+        parser.add_argument('--lat', type=float,
+                            default=geocoding.STUB_CENTRE[0])
+        parser.add_argument('--lng', type=float,
+                            default=geocoding.STUB_CENTRE[1])
+        parser.add_argument('--spread', type=float, default=0.1,
+                            help='Degrees around the point.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rng = random.Random(options['seed'])
+        spread = options['spread']
+        coordinates = [
+            (options['lat'] + rng.uniform(-spread, spread),
+             options['lng'] + rng.uniform(-spread, spread))
+            for _ in range(options['companies'])
+        ]
+
+        with transaction.atomic():
+            owner = get_user_model().objects.filter(
+                email=OWNER_EMAIL).first()
+            if owner is None:
+                owner = creating.create_staff(email=OWNER_EMAIL)
+            companies = creating.create_companies(
+                owner, coordinates, points_needed=options['points_needed'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(companies)} companies.'))
@@ -0,0 +1,278 @@
+"""
+Counters and histograms shared by every worker process.
+
+Each process adds to its own memory-mapped file in the directory of its
+service under METRICS_DIR, so no locking is needed between processes,
+and the /metrics endpoint sums the files of all of them. Only monotonic
+values are stored: a process starting merges the files of the exited
+processes of its host into one archive file, and a service clears its
+directory when it starts so recreated containers leave nothing behind.
+"""
+
+import fcntl
+import mmap
+import os
+import shutil
+import socket
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+from core.timing import BUCKETS
+
+
+INITIAL_SIZE = 1 << 16
+HEADER = struct.Struct('i')
+LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+TYPES = {
+    'http_request_duration_ms': 'histogram',
+    'db_queries_total': 'counter',
+    'db_query_duration_ms_total': 'counter',
+    'ocr_duration_ms': 'histogram',
+    'geocode_lookups_total': 'counter',
+    'receipt_jobs_total': 'counter',
+}
+
+
+class MmapedValues:
+    """
+    Float values by key in a memory-mapped file written by a single
+    process. Each entry is its key length, key and value; the header
+    holds the bytes used, updated once an entry is complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        if os.path.getsize(path) == 0:
+            self.file.truncate(INITIAL_SIZE)
+        self.capacity = os.path.getsize(path)
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.positions = {}
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        for key, value, position in read_entries(self.map, self.used):
+            self.positions[key] = position
+
+    def _grow(self, needed):
+        """Double the file until needed more bytes fit."""
+        capacity = self.capacity
+        while self.used + needed > capacity:
+            capacity *= 2
+        self.map.close()
+        self.file.truncate(capacity)
+        self.capacity = capacity
+        self.map = mmap.mmap(self.file.fileno(), capacity)
+
+    def _position(self, key):
+        """Return where the value of key is, adding it if it is new."""
+        position = self.positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode()
+        # Pad the key so the value is aligned on 8 bytes.
+        padded = encoded + b' ' * (
+            -(self.used + LENGTH.size + len(encoded)) % 8)
+        needed = LENGTH.size + len(padded) + VALUE.size
+        if self.used + needed > self.capacity:
+            self._grow(needed)
+        LENGTH.pack_into(self.map, self.used, len(padded))
+        self.map[self.used + LENGTH.size:
+                 self.used + LENGTH.size + len(padded)] = padded
+        position = self.used + LENGTH.size + len(padded)
+        VALUE.pack_into(self.map, position, 0.0)
+        self.used += needed
+        HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+
+        return position
+
+    def add(self, key, amount):
+        """Add amount to the value of key."""
+        with self.lock:
+            position = self._position(key)
+            value = VALUE.unpack_from(self.map, position)[0]
+            VALUE.pack_into(self.map, position, value + amount)
+
+    def close(self):
+        """Unmap and close the file."""
+        self.map.close()
+        self.file.close()
+
+
+def read_entries(buffer, used):
+    """Yield the (key, value, value position) entries of a buffer."""
+    position = HEADER.size
+    while position < used:
+        length = LENGTH.unpack_from(buffer, position)[0]
+        position += LENGTH.size
+        key = bytes(buffer[position:position + length]).decode().rstrip()
+        position += length
+        yield key, VALUE.unpack_from(buffer, position)[0], position
+        position += VALUE.size
+
+
+def read_file(path):
+    """Return the values of one process file."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < HEADER.size:
+        return {}
+    used = min(HEADER.unpack_from(data, 0)[0], len(data))
+
+    return {key: value for key, value, _ in read_entries(data, used)}
+
+
+def service_dir():
+    """Return the directory of the files of this service."""
+    return os.path.join(settings.METRICS_DIR, settings.METRICS_SERVICE)
+
+
+def clear():
+    """Remove the files left by the previous run of this service."""
+    shutil.rmtree(service_dir(), ignore_errors=True)
+
+
+def alive(pid):
+    """Return whether a process of this host is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def merge_exited(directory):
+    """
+    Add the files of the exited processes of this host to its archive
+    file and remove them.
+    """
+    host = socket.gethostname()
+    exited = []
+    for name in os.listdir(directory):
+        if not name.endswith('.db'):
+            continue
+        prefix, _, pid = name[:-len('.db')].rpartition('-')
+        if prefix == host and pid.isdigit() and not alive(int(pid)):
+            path = os.path.join(directory, name)
+            # Only the process that renames a file merges it, and a file
+            # left half merged is no longer read twice.
+            try:
+                os.rename(path, f'{path}.merging')
+            except FileNotFoundError:
+                continue
+            exited.append(f'{path}.merging')
+    if not exited:
+        return
+
+    path = os.path.join(directory, f'{host}-archive.db')
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = MmapedValues(path)
+        try:
+            for merging in exited:
+                for key, value in read_file(merging).items():
+                    archive.add(key, value)
+                os.remove(merging)
+        finally:
+            archive.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """Return the file of this process, opening it after a fork."""
+    global _store
+    owner = (os.getpid(), service_dir())
+    with _store_lock:
+        if _store is None or _store[0] != owner:
+            directory = service_dir()
+            os.makedirs(directory, exist_ok=True)
+            merge_exited(directory)
+            path = os.path.join(
+                directory, f'{socket.gethostname()}-{os.getpid()}.db')
+            _store = (owner, MmapedValues(path))
+
+        return _store[1]
+
+
+def series(name, labels):
+    """Return the exposition name of a series."""
+    if not labels:
+        return name
+    pairs = ','.join(
+        f'{label}="{value}"' for label, value in sorted(labels.items()))
+
+    return f'{name}{{{pairs}}}'
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter, when metrics are enabled."""
+    if settings.METRICS_DIR:
+        store().add(series(name, labels), amount)
+
+
+def observe(name, value, **labels):
+    """Record an observation in a histogram, when metrics are enabled."""
+    if not settings.METRICS_DIR:
+        return
+    values = store()
+    # Every bucket is written, so they are stored in increasing order.
+    for bound in BUCKETS:
+        le = '+Inf' if bound == float('inf') else str(bound)
+        values.add(
+            series(f'{name}_bucket', dict(labels, le=le)),
+            1 if value <= bound else 0)
+    values.add(series(f'{name}_sum', labels), value)
+    values.add(series(f'{name}_count', labels), 1)
+
+
+def collect():
+    """Return the values of every series summed over all processes."""
+    totals = defaultdict(float)
+    if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+        return totals
+    for directory, _, names in sorted(os.walk(settings.METRICS_DIR)):
+        for name in sorted(names):
+            if name.endswith('.db'):
+                path = os.path.join(directory, name)
+                for key, value in read_file(path).items():
+                    totals[key] += value
+
+    return totals
+
+
+def family(key):
+    """Return the metric a series belongs to."""
+    name = key.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in TYPES:
+            return name[:-len(suffix)]
+
+    return name
+
+
+def exposition(totals, gauges):
+    """Return the series and gauges in the Prometheus text format."""
+    families = defaultdict(list)
+    for key, value in totals.items():
+        families[family(key)].append((key, value))
+    lines = []
+    for name in sorted(families):
+        lines.append(f'# TYPE {name} {TYPES.get(name, "untyped")}')
+        for key, value in families[name]:
+            lines.append(f'{key} {value!r}')
+    for name, value in gauges.items():
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {float(value)!r}')
+
+    return '\n'.join(lines) + '\n'
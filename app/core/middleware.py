@@ -0,0 +1,105 @@
+"""Middleware shared by the APIs."""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+
+from core import metrics, profiles, querylog, timing
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileMiddleware:
+    """
+    Attach the shopper and company ids of the user as request.profile.
+    They are resolved on first use, after DRF has authenticated the
+    request, and shared with the DRF request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(
+            lambda: profiles.for_user(request.user))
+
+        return self.get_response(request)
+
+
+def view_name(view_func, method):
+    """Return ViewSet.action for DRF viewsets, else the view's name."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+
+    return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+
+
+class TimingMiddleware:
+    """
+    Time each request, its queries and the OCR, geocoding and outbound
+    HTTP calls it makes, report them in a Server-Timing header and
+    record them in the histograms of its view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = timing.start()
+        began = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timer.wrap_query):
+                response = self.get_response(request)
+        finally:
+            timing.stop()
+        total = time.perf_counter() - began
+
+        response['Server-Timing'] = timer.header(total)
+        view = getattr(request, 'timing_view', None)
+        if view is not None:
+            timing.observe(view, total, timer)
+            metrics.observe('http_request_duration_ms', total * 1000,
+                            view=view)
+            metrics.inc('db_queries_total', timer.queries, view=view)
+            metrics.inc('db_query_duration_ms_total',
+                        timer.durations['db'] * 1000, view=view)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing_view = view_name(view_func, request.method)
+
+
+class QueryInspectorMiddleware:
+    """
+    Log the statements a request repeats, as N+1 patterns do, and those
+    slower than SLOW_QUERY_MS. Only used when QUERY_INSPECTOR is set, as
+    on staging.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = querylog.QueryLog()
+        with connection.execute_wrapper(log):
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(log.count)
+        problems = log.report(
+            settings.QUERY_REPEAT_THRESHOLD, settings.SLOW_QUERY_MS)
+        if problems:
+            logger.warning(
+                '%s %s ran %d queries:\n%s', request.method,
+                request.get_full_path(), log.count, '\n'.join(problems))
+
+        return response
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+# Frozen copy of core.geo.encode, so later changes to it leave this
+# migration alone.
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(lat, long, precision=12):
+    """Return the geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    long_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        value, interval = (long, long_range) if even else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def fill_geohash(apps, schema_editor):
+    """Index the companies saved before the geohash column existed."""
+    Company = apps.get_model('core', 'Company')
+    companies = Company.objects.exclude(lat=None).exclude(long=None)
+    for company in companies.iterator():
+        company.geohash = encode(float(company.lat), float(company.long))
+        company.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_auto_20230202_2209'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_company_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeoIPRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_ip', models.DecimalField(db_index=True, decimal_places=0, max_digits=39)),
+                ('last_ip', models.DecimalField(decimal_places=0, max_digits=39)),
+                ('lat', models.FloatField()),
+                ('long', models.FloatField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_geoiprange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_code', models.CharField(max_length=10, unique=True)),
+                ('lat', models.FloatField()),
+                ('long', models.FloatField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
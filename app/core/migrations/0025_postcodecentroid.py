@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostcodeCentroid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_code', models.CharField(max_length=10, unique=True)),
+                ('lat', models.FloatField()),
+                ('long', models.FloatField()),
+            ],
+        ),
+    ]
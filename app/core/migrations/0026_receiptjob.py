@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_postcodecentroid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('duplicate', 'Duplicate'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('detail', models.CharField(blank=True, max_length=200)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('mycards', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.mycards')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_receiptjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcrResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
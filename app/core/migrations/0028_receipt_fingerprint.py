@@ -0,0 +1,136 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:10
+
+import datetime
+import hashlib
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+KEY_PATTERN = re.compile(r"^(?P<company>.*?)(?P<dates>\[.*?\])(?P<hours>\[.*?\])$")
+
+# Frozen copies of the receipt.services parsers and fingerprint, so later
+# changes to them leave this migration alone.
+DATE_PATTERN = r"\d{2}[/-]\d{2}[/-]\d{4}"
+HOUR_PATTERN = r"\d{2}[:]\d{2}[:]\d{2}"
+
+
+def parse_date(text):
+    """Return the first day/month/year date of a text, if any."""
+    for found in re.findall(DATE_PATTERN, text):
+        try:
+            return datetime.datetime.strptime(
+                found.replace('-', '/'), '%d/%m/%Y').date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def parse_time(text):
+    """Return the first hour:minute:second time of a text, if any."""
+    for found in re.findall(HOUR_PATTERN, text):
+        try:
+            return datetime.datetime.strptime(found, '%H:%M:%S').time()
+        except ValueError:
+            continue
+
+    return None
+
+
+def fingerprint(company_id, date, time, total):
+    """Return the signed 64-bit hash identifying a receipt."""
+    key = f'{company_id}|{date}|{time}|{total}'.encode()
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def fingerprint_receipts(apps, schema_editor):
+    """
+    Rebuild the receipts recorded with a string key as fingerprints.
+    The old keys never held the total, so it is left empty; new receipts
+    are checked against the fingerprint without a total too. Keys whose
+    company can no longer be found, or that repeat an earlier receipt,
+    are moved to LegacyReceipt rather than lost.
+    """
+    Company = apps.get_model('core', 'Company')
+    Receipt = apps.get_model('core', 'Receipt')
+    LegacyReceipt = apps.get_model('core', 'LegacyReceipt')
+    seen = set()
+    for receipt in Receipt.objects.order_by('id').iterator():
+        match = KEY_PATTERN.match(receipt.receipt_key)
+        company = match and Company.objects.filter(
+            company_name=match.group('company')).order_by('id').first()
+        if company is None:
+            LegacyReceipt.objects.create(
+                receipt_key=receipt.receipt_key, reason='unknown company')
+            receipt.delete()
+            continue
+        date = parse_date(match.group('dates'))
+        time = parse_time(match.group('hours'))
+        key = fingerprint(company.pk, date, time, None)
+        if (company.pk, key) in seen:
+            LegacyReceipt.objects.create(
+                receipt_key=receipt.receipt_key, reason='duplicate')
+            receipt.delete()
+            continue
+        seen.add((company.pk, key))
+        receipt.company = company
+        receipt.date = date
+        receipt.time = time
+        receipt.fingerprint = key
+        receipt.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_ocrresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='total',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='fingerprint',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='LegacyReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('receipt_key', models.CharField(max_length=300)),
+                ('reason', models.CharField(max_length=20)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(fingerprint_receipts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_receipt_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='receipt',
+            name='receipt_key',
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='fingerprint',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='receipt',
+            constraint=models.UniqueConstraint(fields=('company', 'fingerprint'), name='unique_receipt_fingerprint'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_ledger(apps, schema_editor):
+    """Record the points every existing card holds as its opening event."""
+    MyCards = apps.get_model('core', 'MyCards')
+    PointEvent = apps.get_model('core', 'PointEvent')
+    events = (
+        PointEvent(mycards_id=mycards_id, kind='opening', delta=points)
+        for mycards_id, points in MyCards.objects.exclude(
+            points=0).values_list('id', 'points').iterator()
+    )
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) == 1000:
+            PointEvent.objects.bulk_create(batch)
+            batch = []
+    PointEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_receipt_fingerprint_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointBalance',
+            fields=[
+                ('mycards', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.mycards')),
+                ('balance', models.IntegerField(default=0)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PointEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening'), ('accrual', 'Accrual'), ('redemption', 'Redemption')], max_length=10)),
+                ('delta', models.IntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('mycards', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.mycards')),
+                ('receipt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.receipt')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pointevent',
+            index=models.Index(fields=['mycards', 'id'], name='pointevent_mycards_id'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
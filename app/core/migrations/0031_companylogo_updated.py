@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_point_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companylogo',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
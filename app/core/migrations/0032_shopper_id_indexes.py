@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_companylogo_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mycards',
+            index=models.Index(fields=['shopper', '-id'], name='mycards_shopper_id'),
+        ),
+        migrations.AddIndex(
+            model_name='mycardshistory',
+            index=models.Index(fields=['shopper', '-id'], name='mycardshistory_shopper_id'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def convert_coordinates(apps, schema_editor):
+    """Parse the text coordinates of every row, a batch at a time."""
+    for name in ('Company', 'Shopper'):
+        model = apps.get_model('core', name)
+        rows = model.objects.exclude(lat=None).exclude(long=None).order_by(
+            'pk').values_list('pk', 'lat', 'long')
+        batch = []
+        for pk, lat, long in rows.iterator(chunk_size=BATCH_SIZE):
+            try:
+                lat_value, long_value = float(lat), float(long)
+            except ValueError:
+                continue
+            batch.append(
+                model(pk=pk, lat_value=lat_value, long_value=long_value))
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, ['lat_value', 'long_value'])
+                batch = []
+        model.objects.bulk_update(batch, ['lat_value', 'long_value'])
+
+
+def restore_coordinates(apps, schema_editor):
+    """Write the coordinates back as text."""
+    for name in ('Company', 'Shopper'):
+        model = apps.get_model('core', name)
+        rows = model.objects.exclude(lat_value=None).exclude(
+            long_value=None).order_by('pk')
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            row.lat = repr(row.lat_value)
+            row.long = repr(row.long_value)
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, ['lat', 'long'])
+                batch = []
+        model.objects.bulk_update(batch, ['lat', 'long'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_shopper_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='lat_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='long_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='shopper',
+            name='lat_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='shopper',
+            name='long_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(convert_coordinates, restore_coordinates),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_coordinates_float_values'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='company',
+            name='lat',
+        ),
+        migrations.RemoveField(
+            model_name='company',
+            name='long',
+        ),
+        migrations.RemoveField(
+            model_name='shopper',
+            name='lat',
+        ),
+        migrations.RemoveField(
+            model_name='shopper',
+            name='long',
+        ),
+        migrations.RenameField(
+            model_name='company',
+            old_name='lat_value',
+            new_name='lat',
+        ),
+        migrations.RenameField(
+            model_name='company',
+            old_name='long_value',
+            new_name='long',
+        ),
+        migrations.RenameField(
+            model_name='shopper',
+            old_name='lat_value',
+            new_name='lat',
+        ),
+        migrations.RenameField(
+            model_name='shopper',
+            old_name='long_value',
+            new_name='long',
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['lat', 'long'], name='company_lat_long'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:34
+
+from django.db import migrations, models
+import phonenumber_field.modelfields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_coordinates_float'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shopper',
+            name='address',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='shopper',
+            name='city',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='shopper',
+            name='phone_number',
+            field=phonenumber_field.modelfields.PhoneNumberField(max_length=128, null=True, region=None),
+        ),
+    ]
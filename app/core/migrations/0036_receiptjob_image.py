@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_shopper_optional_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receiptjob',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='mycards'),
+        ),
+    ]
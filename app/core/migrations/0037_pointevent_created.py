@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_receiptjob_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pointevent',
+            index=models.Index(fields=['created'], name='pointevent_created'),
+        ),
+    ]
@@ -3,7 +3,8 @@
 import uuid
 import os
 
-from django.db import models
+from django.db import connections, models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -11,14 +12,11 @@ from django.contrib.auth.models import (
     )
 from app import settings
 
-from PIL import Image
-import re
-import pytesseract
-
 from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumberField
 
-from geopy.geocoders import Nominatim
+from core import geo, geocoding
+from receipt import services
 
 
 def company_image_file_path(instance, filename):
@@ -62,6 +60,34 @@ class UserManager(BaseUserManager):
         return user
 
 
+class GeocodedMixin:
+    """Geocode post_code into lat/long, skipping unchanged post codes."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._geocoded_post_code = instance.__dict__.get('post_code')
+
+        return instance
+
+    def geocode(self):
+        """
+        Set lat/long from post_code unless it has not changed. A post
+        code that cannot be located clears them, and is retried by the
+        next save.
+        """
+        unchanged = self.post_code == getattr(
+            self, '_geocoded_post_code', None)
+        if unchanged and self.lat is not None:
+            return
+        point = geocoding.lookup(self.post_code)
+        if point is None:
+            self.lat = self.long = None
+            return
+        self.lat, self.long = point
+        self._geocoded_post_code = self.post_code
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """User in the system"""
     email = models.EmailField(max_length=255, unique=True)
@@ -74,7 +100,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
-class Company(models.Model):
+class Company(GeocodedMixin, models.Model):
     """Company object."""
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -90,17 +116,24 @@ class Company(models.Model):
     phone_number = PhoneNumberField(null=True, blank=True)
     updated = models.DateTimeField(auto_now=True, blank=True)
     active = models.BooleanField(default=True)
-    lat = models.CharField(max_length=20, null=True, blank=True)
-    long = models.CharField(max_length=20, null=True, blank=True)
+    lat = models.FloatField(null=True, blank=True)
+    long = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lat', 'long'], name='company_lat_long'),
+        ]
 
     def __str__(self):
         return self.company_name
 
     def save(self, *args, **kwargs):
-        geolocator = Nominatim(user_agent="home")
-        location = geolocator.geocode(self.post_code)
-        self.lat = location.latitude
-        self.long = location.longitude
+        self.geocode()
+        if self.lat is None:
+            self.geohash = ''
+        else:
+            self.geohash = geo.encode(self.lat, self.long)
 
         return super().save(*args, **kwargs)
 
@@ -109,6 +142,7 @@ class CompanyLogo(models.Model):
     company = models.OneToOneField(Company, on_delete=models.CASCADE)
     logo = models.ImageField(
         upload_to=company_image_file_path, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True)
 
 
 class Card(models.Model):
@@ -126,7 +160,7 @@ class Card(models.Model):
         return self.title
 
 
-class Shopper(models.Model):
+class Shopper(GeocodedMixin, models.Model):
     """Shopper Object"""
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -143,17 +177,14 @@ class Shopper(models.Model):
     phone_number = PhoneNumberField(null=True)
     updated = models.DateTimeField(auto_now=True, blank=True)
     active = models.BooleanField(default=True)
-    lat = models.CharField(max_length=20, null=True, blank=True)
-    long = models.CharField(max_length=20, null=True, blank=True)
+    lat = models.FloatField(null=True, blank=True)
+    long = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
     def save(self, *args, **kwargs):
-        geolocator = Nominatim(user_agent="home")
-        location = geolocator.geocode(self.post_code)
-        self.lat = location.latitude
-        self.long = location.longitude
+        self.geocode()
 
         return super().save(*args, **kwargs)
 
@@ -164,28 +195,41 @@ class MyCards(models.Model):
         Shopper, on_delete=models.CASCADE)
     card = models.ForeignKey(Card, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='mycards', null=True)
+    # Points the card is opened with; the ledger keeps its balance.
     points = models.IntegerField(default=1)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     code = models.CharField(max_length=6, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['shopper', '-id'], name='mycards_shopper_id'),
+        ]
+
     def __str__(self):
         return self.card.company.company_name
 
-    def save(self, *args, **kwargs):
-        """Create Receipt object"""
-        if self.image:
-            img_txt = pytesseract.image_to_string(Image.open(self.image))
-            date_pattern = r"\d{2}[/-]\d{2}[/-]\d{4}"
-            hour_pattern = r"\d{2}[:]\d{2}[:]\d{2}"
-            date = re.findall(date_pattern, img_txt)
-            hour = re.findall(hour_pattern, img_txt)
-            company = self.card.company.company_name
-            key = company + str(date) + str(hour)
-            Receipt.objects.create(
-                receipt_key=key,
-            )
-        return super().save(*args, **kwargs)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_image = instance.__dict__.get('image')
+
+        return instance
+
+    def save(self, *args, receipt=None, **kwargs):
+        """
+        Create the Receipt of a new image, reading it unless the
+        receipt was already read by the caller.
+        """
+        if self.image and self.image.name != getattr(
+                self, '_saved_image', None):
+            if receipt is None:
+                receipt = services.read_receipt(
+                    self.image, self.card.company)
+            Receipt.objects.record(receipt)
+        super().save(*args, **kwargs)
+        self._saved_image = self.image.name
 
 
 class MyCardsHistory(models.Model):
@@ -200,10 +244,202 @@ class MyCardsHistory(models.Model):
     code = models.CharField(max_length=6, blank=True)
     finalized = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['shopper', '-id'], name='mycardshistory_shopper_id'),
+        ]
+
     def __str__(self):
         return f"{self.shopper.user.email} - {self.card.company.company_name}"
 
 
+class OcrResult(models.Model):
+    """Text read from an image, keyed by the SHA-256 of its bytes."""
+    digest = models.CharField(max_length=64, unique=True)
+    text = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.digest
+
+
+class ReceiptJob(models.Model):
+    """Background processing of a receipt uploaded to a MyCards."""
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+    DUPLICATE = 'duplicate'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (ACCEPTED, 'Accepted'),
+        (REJECTED, 'Rejected'),
+        (DUPLICATE, 'Duplicate'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    mycards = models.ForeignKey(MyCards, on_delete=models.CASCADE)
+    image = models.ImageField(upload_to='mycards', null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    detail = models.CharField(max_length=200, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.id} - {self.status}'
+
+
+class GeocodeCache(models.Model):
+    """Geocoded location of a normalized post code."""
+    post_code = models.CharField(max_length=10, unique=True)
+    lat = models.FloatField()
+    long = models.FloatField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.post_code
+
+
+class PostcodeCentroid(models.Model):
+    """Centroid of a normalized post code from an offline gazetteer."""
+    post_code = models.CharField(max_length=10, unique=True)
+    lat = models.FloatField()
+    long = models.FloatField()
+
+    def __str__(self):
+        return self.post_code
+
+
+class GeoIPRange(models.Model):
+    """Offline GeoIP block locating the addresses first_ip..last_ip."""
+    first_ip = models.DecimalField(
+        max_digits=39, decimal_places=0, db_index=True)
+    last_ip = models.DecimalField(max_digits=39, decimal_places=0)
+    lat = models.FloatField()
+    long = models.FloatField()
+
+    def __str__(self):
+        return f'{self.first_ip} - {self.last_ip}'
+
+
+class ReceiptManager(models.Manager):
+    """Manager for receipts."""
+
+    def record(self, receipt):
+        """
+        Insert the receipt unless its fingerprint, or the one without its
+        total, is already known and return its id, or None when it was
+        not inserted, in a single round trip.
+        """
+        connection = connections[self.db]
+        fields = ['company', 'date', 'time', 'total', 'fingerprint',
+                  'created']
+        values = [
+            receipt.company_id, receipt.date, receipt.time, receipt.total,
+            receipt.fingerprint, timezone.now(),
+        ]
+        columns = []
+        params = []
+        for name, value in zip(fields, values):
+            field = self.model._meta.get_field(name)
+            columns.append(connection.ops.quote_name(field.column))
+            params.append(field.get_db_prep_save(value, connection))
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        company = connection.ops.quote_name(
+            self.model._meta.get_field('company').column)
+        fingerprint = connection.ops.quote_name(
+            self.model._meta.get_field('fingerprint').column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(columns)}) '
+                f'SELECT {", ".join(["%s"] * len(params))} '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {table} '
+                f'WHERE {company} = %s AND {fingerprint} = %s) '
+                'ON CONFLICT (company_id, fingerprint) DO NOTHING '
+                'RETURNING id',
+                params + [receipt.company_id,
+                          services.fingerprint_without_total(receipt)],
+            )
+            row = cursor.fetchone()
+
+        return None if row is None else row[0]
+
+
 class Receipt(models.Model):
     """Receipt Object"""
-    receipt_key = models.CharField(max_length=300, unique=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    date = models.DateField(null=True, blank=True)
+    time = models.TimeField(null=True, blank=True)
+    total = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)
+    fingerprint = models.BigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = ReceiptManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'fingerprint'],
+                name='unique_receipt_fingerprint',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.company_id} - {self.date} {self.time}'
+
+
+class LegacyReceipt(models.Model):
+    """Old format receipt key that could not become a fingerprint."""
+    receipt_key = models.CharField(max_length=300)
+    reason = models.CharField(max_length=20)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.receipt_key
+
+
+class PointEvent(models.Model):
+    """Append-only record of the points added to or taken from a card"""
+    OPENING = 'opening'
+    ACCRUAL = 'accrual'
+    REDEMPTION = 'redemption'
+    KIND_CHOICES = [
+        (OPENING, 'Opening'),
+        (ACCRUAL, 'Accrual'),
+        (REDEMPTION, 'Redemption'),
+    ]
+
+    mycards = models.ForeignKey(MyCards, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    delta = models.IntegerField()
+    receipt = models.ForeignKey(
+        Receipt, on_delete=models.SET_NULL, null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['mycards', 'id'], name='pointevent_mycards_id'),
+            models.Index(fields=['created'], name='pointevent_created'),
+        ]
+
+    def __str__(self):
+        return f'{self.mycards_id} {self.kind} {self.delta:+d}'
+
+
+class PointBalance(models.Model):
+    """Balance of a card compacted from its point events"""
+    mycards = models.OneToOneField(
+        MyCards, on_delete=models.CASCADE, primary_key=True)
+    balance = models.IntegerField(default=0)
+    last_event_id = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.mycards_id}: {self.balance}'
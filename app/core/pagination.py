@@ -0,0 +1,15 @@
+"""Pagination shared by the shopper card APIs."""
+
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Paginate a shopper's rows newest first by id, seeking from the
+    cursor through the (shopper, -id) index instead of counting or
+    skipping the rows before it.
+    """
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
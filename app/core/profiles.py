@@ -0,0 +1,73 @@
+"""Shopper and company ids of each user kept in a process-local cache."""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+
+Profile = namedtuple('Profile', ['shopper_id', 'company_id'])
+ANONYMOUS = Profile(None, None)
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def load(user_id):
+    """Query the first shopper and company of a user."""
+    from core.models import Company, Shopper
+
+    return Profile(
+        Shopper.objects.filter(user_id=user_id).order_by('id').values_list(
+            'id', flat=True).first(),
+        Company.objects.filter(user_id=user_id).order_by('id').values_list(
+            'id', flat=True).first(),
+    )
+
+
+def lookup(user_id):
+    """
+    Return the profile of a user, querying it at most once every
+    PROFILE_CACHE_TTL seconds. Saves in this process invalidate it at
+    once, saves in other processes once the entry expires. A user with
+    neither a shopper nor a company is not cached, so the first one
+    created in any process is seen at once.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry is not None and entry[0] > now:
+            _cache.move_to_end(user_id)
+            return entry[1]
+
+    profile = load(user_id)
+    if profile == ANONYMOUS:
+        return profile
+    with _lock:
+        _cache[user_id] = (now + settings.PROFILE_CACHE_TTL, profile)
+        _cache.move_to_end(user_id)
+        while len(_cache) > settings.PROFILE_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return profile
+
+
+def for_user(user):
+    """Return the profile of a user, anonymous ones included."""
+    if not user.is_authenticated:
+        return ANONYMOUS
+
+    return lookup(user.pk)
+
+
+def invalidate(user_id):
+    """Forget the cached profile of a user."""
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def clear():
+    """Forget every cached profile."""
+    with _lock:
+        _cache.clear()
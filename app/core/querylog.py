@@ -0,0 +1,89 @@
+"""Capture the SQL of a block and flag repeated and slow statements."""
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+
+STRING = re.compile(r"'(?:''|[^'])*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """Return the template of a statement, without its literal values."""
+    template = STRING.sub('?', sql)
+    template = template.replace('%s', '?')
+    template = NUMBER.sub('?', template)
+    template = PLACEHOLDER_LIST.sub('(...)', template)
+
+    return SPACE.sub(' ', template).strip()
+
+
+@dataclass
+class Template:
+    """Executions of one statement template."""
+    sql: str
+    count: int = 0
+    duration: float = 0.0
+    slowest: float = 0.0
+    examples: list = field(default_factory=list)
+
+
+class QueryLog:
+    """
+    Database execute wrapper grouping the statements it sees by
+    template, to be installed with connection.execute_wrapper.
+    """
+
+    def __init__(self):
+        self.templates = OrderedDict()
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - began)
+
+    def record(self, sql, seconds):
+        """Count one execution of a statement."""
+        key = normalize(sql)
+        template = self.templates.get(key)
+        if template is None:
+            template = self.templates[key] = Template(key)
+        template.count += 1
+        template.duration += seconds
+        template.slowest = max(template.slowest, seconds)
+        if len(template.examples) < 3:
+            template.examples.append(sql)
+        self.count += 1
+
+    def repeated(self, threshold):
+        """Return the templates run at least threshold times."""
+        return [
+            template for template in self.templates.values()
+            if template.count >= threshold
+        ]
+
+    def slow(self, threshold_ms):
+        """Return the templates with a run slower than threshold_ms."""
+        return [
+            template for template in self.templates.values()
+            if template.slowest * 1000 >= threshold_ms
+        ]
+
+    def report(self, repeat_threshold, slow_ms):
+        """Return the lines describing the repeated and slow templates."""
+        lines = []
+        for template in self.repeated(repeat_threshold):
+            lines.append(
+                f'repeated {template.count} times: {template.sql}')
+        for template in self.slow(slow_ms):
+            lines.append(
+                f'slow {template.slowest * 1000:.1f}ms: {template.sql}')
+
+        return lines
@@ -0,0 +1,53 @@
+"""Signal handlers keeping indexes and ledgers in sync with the models."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core import authentication, distance, ledger, profiles
+from core.models import Company, MyCards, PointEvent, Shopper, User
+
+
+@receiver(post_save, sender=Company)
+def index_company(sender, instance, **kwargs):
+    """Move a saved company in the distance index."""
+    distance.companies.update(instance.pk, instance.lat, instance.long)
+
+
+@receiver(post_delete, sender=Company)
+def unindex_company(sender, instance, **kwargs):
+    """Drop a deleted company from the distance index."""
+    distance.companies.remove(instance.pk)
+
+
+@receiver(post_save, sender=MyCards)
+def open_mycards(sender, instance, created, **kwargs):
+    """Record the points a new card starts with in the ledger."""
+    if created and instance.points:
+        ledger.append([PointEvent(
+            mycards=instance, kind=PointEvent.OPENING,
+            delta=instance.points)])
+
+
+@receiver(post_save, sender=Shopper)
+@receiver(post_delete, sender=Shopper)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_profile(sender, instance, **kwargs):
+    """Forget the cached profile of the owner of a shopper or company."""
+    profiles.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the cache."""
+    authentication.forget(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached token of a changed, e.g. deactivated, user."""
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list(
+                'key', flat=True):
+            authentication.forget(key)
@@ -0,0 +1,11 @@
+"""Background tasks of the core models."""
+
+from celery import shared_task
+
+from core import ledger
+
+
+@shared_task
+def compact_point_balances():
+    """Fold the recent point events into the card balances."""
+    return ledger.compact()
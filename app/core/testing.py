@@ -0,0 +1,74 @@
+"""Assertions shared by the API test suites."""
+
+import contextlib
+
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.querylog import QueryLog
+
+
+class QueryCountMixin:
+    """TestCase mixin catching endpoints that run too many queries."""
+
+    def assertQueriesDoNotGrow(self, request, grow, times=3):
+        """
+        Call request, add rows by calling grow times times and call
+        request again, failing if it needed more queries the second time.
+        """
+        with CaptureQueriesContext(connection) as before:
+            request()
+        for _ in range(times):
+            grow()
+        with CaptureQueriesContext(connection) as after:
+            request()
+
+        if len(after) > len(before):
+            queries = '\n'.join(query['sql'] for query in after)
+            self.fail(
+                f'{len(before)} queries grew to {len(after)} after adding '
+                f'{times} rows:\n{queries}')
+
+    @contextlib.contextmanager
+    def assertQueryBudget(self, queries, repeats=None):
+        """
+        Fail when the block runs more than queries statements or runs
+        the same statement template repeats times or more.
+        """
+        if repeats is None:
+            repeats = settings.QUERY_REPEAT_THRESHOLD
+        log = QueryLog()
+        with connection.execute_wrapper(log):
+            yield log
+
+        problems = log.report(repeats, float('inf'))
+        if log.count > queries:
+            problems.insert(
+                0, f'{log.count} queries over a budget of {queries}')
+        if problems:
+            self.fail('\n'.join(problems))
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner keeping every cache in the test process, so the suite
+    never reads or flushes the redis caches shared with a deployment.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.local_caches = override_settings(CACHES={
+            alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': alias,
+                'TIMEOUT': config.get('TIMEOUT', 300),
+            }
+            for alias, config in settings.CACHES.items()
+        })
+        self.local_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.local_caches.disable()
+        super().teardown_test_environment(**kwargs)
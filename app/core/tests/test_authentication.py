@@ -0,0 +1,72 @@
+"""Test the cached token authentication."""
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import authentication
+from core.management.commands import creating
+
+
+SHOPPER_URL = reverse('shopper-list')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests through the token cache."""
+
+    def setUp(self):
+        caches['tokens'].clear()
+        self.user = creating.create_user(email='token@example.com')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_token_cached(self):
+        """Test the token is only queried on the first request."""
+        self.client.get(SHOPPER_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SHOPPER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating at once."""
+        self.client.get(SHOPPER_URL)
+
+        self.token.delete()
+        res = self.client.get(SHOPPER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test the token of a deactivated user stops authenticating."""
+        self.client.get(SHOPPER_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(SHOPPER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_inactive_user_rejected(self):
+        """Test a cached token of an inactive user is rejected."""
+        self.client.get(SHOPPER_URL)
+        token = caches['tokens'].get(authentication.cache_key(self.token))
+        token.user.is_active = False
+        caches['tokens'].set(authentication.cache_key(self.token), token)
+
+        res = self.client.get(SHOPPER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(SHOPPER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -2,11 +2,16 @@
 Test custom Django management commands
 '''
 
+import tempfile
+
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import geocoding
+from core.models import PostcodeCentroid
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -30,3 +35,37 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class LoadPostcodesTests(TestCase):
+    """Test loading the post code gazetteer."""
+
+    def setUp(self):
+        geocoding.clear()
+        self.csv = tempfile.NamedTemporaryFile('w', suffix='.csv')
+        self.csv.write(
+            'postcode,latitude,longitude\n'
+            'N14 6HB,51.6309,-0.1281\n'
+            'CR0 1XX,51.3727,-0.0983\n'
+            'ZZ9 9ZZ,,\n'
+        )
+        self.csv.flush()
+
+    def tearDown(self):
+        self.csv.close()
+
+    def test_load_postcodes(self):
+        """Test post codes are normalized and rows without location skipped."""
+        call_command('load_postcodes', self.csv.name, batch_size=1)
+
+        self.assertEqual(PostcodeCentroid.objects.count(), 2)
+        centroid = PostcodeCentroid.objects.get(post_code='N146HB')
+        self.assertEqual(centroid.lat, 51.6309)
+
+    @override_settings(GEOCODER_BACKEND='gazetteer')
+    def test_gazetteer_backend(self):
+        """Test the offline backend answers from the loaded centroids."""
+        call_command('load_postcodes', self.csv.name)
+
+        self.assertEqual(geocoding.lookup('cr01xx'), (51.3727, -0.0983))
+        self.assertIsNone(geocoding.lookup('ZZ99ZZ'))
@@ -0,0 +1,160 @@
+"""Test conditional GET on the read endpoints."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from company import fragments
+from core import ledger
+from core.models import Company, MyCards
+from core.management.commands import creating
+
+
+def mycards_url(shopper_pk):
+    """Create and return the mycards list URL."""
+    return reverse('mycards-list', args=[shopper_pk])
+
+
+def mycards_detail_url(shopper_pk, mycards_pk):
+    """Create and return a mycards detail URL."""
+    return reverse('mycards-detail', args=[shopper_pk, mycards_pk])
+
+
+COMPANY_URL = reverse('company-list')
+SHOPPER_URL = reverse('shopper-list')
+
+
+class ConditionalGetTests(TestCase):
+    """Test answering unchanged lists with 304 Not Modified."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = creating.create_user(email='etag@example.com')
+        self.client.force_authenticate(self.user)
+        self.shopper = creating.create_shopper(user=self.user)
+        staff = creating.create_staff(email='etagstaff@example.com')
+        self.card = creating.create_card(
+            company=creating.create_company(user=staff))
+        self.mycards = MyCards.objects.create(
+            shopper=self.shopper, card=self.card)
+
+    def test_unchanged_detail_not_modified(self):
+        """Test a detail matching the ETag is answered with 304."""
+        url = mycards_detail_url(self.shopper.pk, self.mycards.pk)
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', res)
+
+        # The card and its point events are aggregated, not loaded
+        with self.assertNumQueries(2):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_depends_on_points(self):
+        """Test a point appended to the ledger changes the detail ETag."""
+        url = mycards_detail_url(self.shopper.pk, self.mycards.pk)
+        etag = self.client.get(url)['ETag']
+
+        ledger.add_point(self.mycards.pk, 10)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['points'], 2)
+
+    def test_unchanged_page_not_aggregated(self):
+        """Test a cursor page matching its ETag is not counted."""
+        res = self.client.get(mycards_url(self.shopper.pk))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                mycards_url(self.shopper.pk), HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('MAX(', query['sql'].upper())
+
+    def test_changed_list_sent_again(self):
+        """Test updating or deleting a row changes the ETag."""
+        etag = self.client.get(mycards_url(self.shopper.pk))['ETag']
+
+        MyCards.objects.filter(pk=self.mycards.pk).update(image='new.jpg')
+        res = self.client.get(
+            mycards_url(self.shopper.pk), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        self.mycards.delete()
+        res = self.client.get(
+            mycards_url(self.shopper.pk), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_company_list_depends_on_cards_and_origin(self):
+        """Test the company ETag changes with its cards and the origin."""
+        params = {'lat': 51.5, 'lng': -0.12}
+        etag = self.client.get(COMPANY_URL, params)['ETag']
+
+        res = self.client.get(
+            COMPANY_URL, {'lat': 52.5, 'lng': -0.12},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(COMPANY_URL, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.card.title = 'Renamed'
+        self.card.save()
+        res = self.client.get(COMPANY_URL, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_company_list_not_aggregated(self):
+        """Test the company ETag does not scan the catalogue tables."""
+        params = {'lat': 51.5, 'lng': -0.12}
+        etag = self.client.get(COMPANY_URL, params)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                COMPANY_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_company_list_reloads_changed_locations(self):
+        """Test a company added by another process is listed at once
+        and not answered with the ETag of the list without it."""
+        params = {'lat': 51.5, 'lng': -0.12}
+        res = self.client.get(COMPANY_URL, params)
+        etag = res['ETag']
+        self.assertEqual(len(res.data['results']), 1)
+
+        # Saved in another process: no signal updated this process
+        company = Company.objects.bulk_create([Company(
+            user=self.card.company.user, company_name='Elsewhere',
+            lat=51.5, long=-0.12)])[0]
+        fragments.bump(company.pk, moved=True)
+
+        res = self.client.get(COMPANY_URL, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+        res = self.client.get(
+            COMPANY_URL, params, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_page_etag_not_modified(self):
+        """Test a list validated by its data is answered with 304."""
+        res = self.client.get(SHOPPER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(SHOPPER_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.shopper.first_name = 'Renamed'
+        self.shopper.save()
+        res = self.client.get(SHOPPER_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
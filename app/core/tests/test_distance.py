@@ -0,0 +1,63 @@
+"""Test for the vectorized distance engine."""
+
+from django.test import SimpleTestCase
+
+from geopy.distance import great_circle
+
+from core import distance
+
+
+class DistanceIndexTests(SimpleTestCase):
+    """Test ranking companies with the distance index."""
+
+    def setUp(self):
+        self.origin = (51.5, -0.12)
+        self.index = distance.CompanyIndex(max_age=float('inf'))
+        self.index.load([
+            (1, '53.48', '-2.24'),
+            (2, '51.501', '-0.121'),
+            (3, '51.6', '-0.2'),
+            (4, None, None),
+        ])
+
+    def test_haversine_matches_great_circle(self):
+        """Test the haversine pass matches geopy."""
+        miles = distance.haversine(
+            self.origin[0], self.origin[1], [53.48], [-2.24])
+
+        expected = great_circle(self.origin, (53.48, -2.24)).miles
+        self.assertAlmostEqual(miles[0], expected, places=6)
+
+    def test_nearest_sorted_by_distance(self):
+        """Test companies without coordinates are skipped."""
+        ids, miles = self.index.nearest(self.origin)
+
+        self.assertEqual(ids.tolist(), [2, 3, 1])
+        self.assertEqual(sorted(miles.tolist()), miles.tolist())
+
+    def test_nearest_limit_and_radius(self):
+        """Test the top-K and radius restrictions."""
+        ids, miles = self.index.nearest(self.origin, limit=1)
+        self.assertEqual(ids.tolist(), [2])
+
+        ids, miles = self.index.nearest(self.origin, radius=20)
+        self.assertEqual(ids.tolist(), [2, 3])
+
+    def test_ties_are_broken_by_id(self):
+        """Test companies at the same distance are ordered by id."""
+        self.index.update(9, '51.501', '-0.121')
+        self.index.update(5, '51.501', '-0.121')
+
+        ids, miles = self.index.nearest(self.origin, limit=2)
+
+        self.assertEqual(ids.tolist(), [2, 5])
+
+    def test_update_and_remove(self):
+        """Test companies are moved and dropped in place."""
+        self.index.update(1, '51.5', '-0.12')
+        self.index.remove(2)
+
+        ids, miles = self.index.nearest(self.origin)
+
+        self.assertEqual(ids.tolist(), [1, 3])
+        self.assertAlmostEqual(miles[0], 0.0)
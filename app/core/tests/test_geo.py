@@ -0,0 +1,102 @@
+"""Test for the geohash spatial index."""
+
+from django.test import SimpleTestCase, TestCase
+
+from geopy.distance import great_circle
+
+from core import geo
+from core.models import Company
+from core.management.commands import creating
+
+
+def place_company(company, lat, long):
+    """Move a company to the given coordinates."""
+    Company.objects.filter(pk=company.pk).update(
+        lat=lat, long=long, geohash=geo.encode(lat, long))
+
+
+class GeohashTests(SimpleTestCase):
+    """Test geohash encoding."""
+
+    def test_encode(self):
+        """Test encoding a known point."""
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_neighbours_include_own_cell(self):
+        """Test the neighbourhood of a point includes its own cell."""
+        cells = geo.neighbours(51.5, -0.12, 5)
+
+        self.assertEqual(len(cells), 9)
+        self.assertIn(geo.encode(51.5, -0.12, 5), cells)
+
+    def test_covered_radius_grows_with_coarser_cells(self):
+        """Test coarser precisions cover a larger radius."""
+        self.assertGreater(
+            geo.covered_radius(51.5, 4), geo.covered_radius(51.5, 5))
+
+    def test_bounding_box_holds_circle(self):
+        """Test the box holds every point of the circle and no more."""
+        origin = (51.5, -0.12)
+        lat_range, long_range = geo.bounding_box(origin, 10)
+        points = [
+            great_circle(miles=10).destination(origin, bearing)
+            for bearing in range(0, 360, 5)
+        ]
+
+        for point in points:
+            self.assertTrue(
+                lat_range[0] - 1e-9 <= point.latitude <= lat_range[1] + 1e-9)
+            self.assertTrue(
+                long_range[0] - 1e-9 <= point.longitude
+                <= long_range[1] + 1e-9)
+        self.assertAlmostEqual(
+            max(point.longitude for point in points), long_range[1],
+            places=3)
+
+    def test_bounding_box_across_antimeridian(self):
+        """Test no longitude range is used across the antimeridian."""
+        lat_range, long_range = geo.bounding_box((0, 179.99), 10)
+
+        self.assertIsNone(long_range)
+
+
+class NearbyTests(TestCase):
+    """Test nearest-company search."""
+
+    def setUp(self):
+        self.user = creating.create_staff(email='geo@example.com')
+        self.origin = (51.5, -0.12)
+        self.near = creating.create_company(self.user, company_name='Near')
+        self.middle = creating.create_company(
+            self.user, company_name='Middle')
+        self.far = creating.create_company(self.user, company_name='Far')
+        place_company(self.near, 51.501, -0.121)
+        place_company(self.middle, 51.6, -0.2)
+        place_company(self.far, 53.48, -2.24)
+
+    def test_nearby_sorted_by_distance(self):
+        """Test all companies are returned sorted by distance."""
+        ranked = geo.nearby(Company.objects.all(), self.origin)
+
+        names = [company.company_name for distance, company in ranked]
+        self.assertEqual(names, ['Near', 'Middle', 'Far'])
+
+    def test_nearby_within_radius(self):
+        """Test only companies within the radius are returned."""
+        ranked = geo.nearby(Company.objects.all(), self.origin, radius=20)
+
+        names = [company.company_name for distance, company in ranked]
+        self.assertEqual(names, ['Near', 'Middle'])
+
+    def test_within_box(self):
+        """Test the bounding box filter keeps the companies nearby."""
+        companies = geo.within_box(Company.objects.all(), self.origin, 20)
+
+        self.assertCountEqual(companies, [self.near, self.middle])
+
+    def test_nearby_limit(self):
+        """Test the nearest companies are returned first."""
+        ranked = geo.nearby(Company.objects.all(), self.origin, limit=2)
+
+        names = [company.company_name for distance, company in ranked]
+        self.assertEqual(names, ['Near', 'Middle'])
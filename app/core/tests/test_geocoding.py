@@ -0,0 +1,123 @@
+"""Test for the post code geocoding cache."""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import geocoding
+from core.models import Company, GeocodeCache, Shopper
+from core.management.commands import creating
+
+
+GEOCODE_STATS_URL = reverse('geocode-stats')
+
+
+@patch('core.geocoding.geocode', return_value=(51.6, -0.12))
+class GeocodingCacheTests(TestCase):
+    """Test geocoding is skipped when the result is already known."""
+
+    def setUp(self):
+        geocoding.clear()
+        self.user = creating.create_user(email='geocode@example.com')
+
+    def test_unchanged_post_code_not_geocoded(self, geocode):
+        """Test saving without changing the post code skips geocoding."""
+        shopper = creating.create_shopper(user=self.user)
+        geocode.assert_called_once_with('n146hb')
+
+        shopper = Shopper.objects.get(pk=shopper.pk)
+        shopper.phone_number = '07518946000'
+        shopper.save()
+
+        geocode.assert_called_once()
+        self.assertEqual(geocoding.stats()['misses'], 1)
+
+    def test_post_code_shared_across_users(self, geocode):
+        """Test users sharing a post code reuse the cached location."""
+        creating.create_shopper(user=self.user, post_code='N14 6HB')
+        other = creating.create_user(email='geocode2@example.com')
+        shopper = creating.create_shopper(user=other, post_code='n146hb')
+
+        geocode.assert_called_once()
+        self.assertEqual(float(shopper.lat), 51.6)
+        self.assertTrue(GeocodeCache.objects.filter(post_code='N146HB'))
+
+    def test_database_cache_survives_process_cache(self, geocode):
+        """Test the database answers once the in-process cache is gone."""
+        geocoding.lookup('n146hb')
+        geocoding.clear()
+
+        self.assertEqual(geocoding.lookup('N14 6HB'), (51.6, -0.12))
+        geocode.assert_called_once()
+        self.assertEqual(geocoding.stats()['db_hits'], 1)
+
+    def test_changed_post_code_geocoded(self, geocode):
+        """Test changing the post code geocodes the new one."""
+        shopper = creating.create_shopper(user=self.user)
+        shopper = Shopper.objects.get(pk=shopper.pk)
+        shopper.post_code = 'cr01xx'
+        shopper.save()
+
+        self.assertEqual(geocode.call_count, 2)
+
+    def test_unknown_post_code_clears_location(self, geocode):
+        """Test a post code that cannot be located is not paired with
+        the old location and is retried on the next save."""
+        company = creating.create_company(user=self.user)
+        company = Company.objects.get(pk=company.pk)
+        geocode.return_value = None
+        company.post_code = 'zz99zz'
+        company.save()
+
+        company.refresh_from_db()
+        self.assertIsNone(company.lat)
+        self.assertIsNone(company.long)
+        self.assertEqual(company.geohash, '')
+
+        geocode.return_value = (51.3727, -0.0983)
+        company.save()
+
+        self.assertEqual((company.lat, company.long), (51.3727, -0.0983))
+        self.assertTrue(company.geohash)
+
+    def test_stats_endpoint(self, geocode):
+        """Test the counters are exposed to staff users."""
+        geocoding.lookup('n146hb')
+        geocoding.lookup('n146hb')
+        client = APIClient()
+        client.force_authenticate(
+            creating.create_staff(email='geostaff@example.com'))
+
+        res = client.get(GEOCODE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['memory_hits'], 1)
+        self.assertEqual(res.data['misses'], 1)
+        self.assertEqual(res.data['hit_ratio'], 0.5)
+
+    def test_stats_endpoint_staff_only(self, geocode):
+        """Test the counters are not exposed to other users."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(GEOCODE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StubGeocoderTests(SimpleTestCase):
+    """Test the load test geocoder makes up stable points."""
+
+    def test_stub_stable_near_centre(self):
+        """Test a post code always gets the same point near the centre."""
+        point = geocoding.stub('N14 6HB')
+
+        self.assertEqual(point, geocoding.stub('n146hb'))
+        self.assertNotEqual(point, geocoding.stub('CR0 1XX'))
+        for value, centre in zip(point, geocoding.STUB_CENTRE):
+            self.assertLessEqual(
+                abs(value - centre), geocoding.STUB_SPREAD)
@@ -0,0 +1,97 @@
+"""Test the points ledger."""
+
+import datetime
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import ledger
+from core.models import MyCards, PointBalance, PointEvent
+from core.management.commands import creating
+
+
+class LedgerTests(TestCase):
+    """Test appending point events and compacting them."""
+
+    def setUp(self):
+        user = creating.create_user(email='ledger@example.com')
+        staff = creating.create_staff(email='ledgerstaff@example.com')
+        self.card = creating.create_card(
+            company=creating.create_company(user=staff), points_needed=3)
+        self.mycards = MyCards.objects.create(
+            shopper=creating.create_shopper(user=user), card=self.card)
+
+    def test_new_card_opened(self):
+        """Test the points of a new card are recorded in the ledger."""
+        event = PointEvent.objects.get(mycards=self.mycards)
+
+        self.assertEqual(event.kind, PointEvent.OPENING)
+        self.assertEqual(event.delta, self.mycards.points)
+        self.assertEqual(ledger.balance(self.mycards.pk), 1)
+
+    def test_accrual_events(self):
+        """Test completing a card adds a point and redeems the card."""
+        events = ledger.accrual(self.mycards.pk, 0, 3)
+
+        self.assertEqual(
+            [(event.kind, event.delta) for event in events],
+            [(PointEvent.ACCRUAL, 1), (PointEvent.REDEMPTION, -3)])
+        self.assertEqual(len(ledger.accrual(self.mycards.pk, 2, 3)), 1)
+
+    def test_compact(self):
+        """Test compaction folds the events into a balance."""
+        ledger.append(ledger.accrual(self.mycards.pk, 2, 3))
+
+        self.assertEqual(ledger.compact(lag=0), 1)
+
+        snapshot = PointBalance.objects.get(mycards=self.mycards)
+        self.assertEqual(snapshot.balance, 2)
+        self.assertEqual(
+            snapshot.last_event_id,
+            PointEvent.objects.latest('id').pk)
+        self.assertEqual(ledger.compact(lag=0), 0)
+
+    def test_balance_reads_tail(self):
+        """Test the balance adds the events newer than the snapshot."""
+        ledger.compact(lag=0)
+        ledger.append(ledger.accrual(self.mycards.pk, 2, 3))
+        ledger.append(ledger.accrual(self.mycards.pk, 0, 3))
+
+        self.assertEqual(ledger.balance(self.mycards.pk), 0)
+        ledger.compact(lag=0)
+        self.assertEqual(
+            PointBalance.objects.get(mycards=self.mycards).balance, 0)
+
+    def test_compact_late_event_of_other_card(self):
+        """Test an event with a lower id than one already folded for
+        another card is folded once it is old enough."""
+        other = MyCards.objects.create(
+            shopper=self.mycards.shopper, card=self.card)
+        old = timezone.now() - datetime.timedelta(minutes=5)
+        PointEvent.objects.filter(mycards=self.mycards).update(
+            created=timezone.now())
+        PointEvent.objects.filter(mycards=other).update(created=old)
+
+        self.assertEqual(ledger.compact(lag=60), 1)
+        self.assertFalse(
+            PointBalance.objects.filter(mycards=self.mycards).exists())
+
+        PointEvent.objects.filter(mycards=self.mycards).update(
+            created=timezone.now() - datetime.timedelta(seconds=90))
+        self.assertEqual(ledger.compact(lag=60), 1)
+        self.assertEqual(
+            PointBalance.objects.get(mycards=self.mycards).balance, 1)
+        self.assertEqual(ledger.balance(self.mycards.pk), 1)
+
+    def test_compact_skips_recent_events(self):
+        """Test events younger than the lag are left for the next run."""
+        self.assertEqual(ledger.compact(lag=60), 0)
+        self.assertFalse(PointBalance.objects.exists())
+
+    def test_compact_points_command(self):
+        """Test the command compacts the ledger."""
+        call_command('compact_points', '--lag=0')
+
+        self.assertEqual(
+            PointBalance.objects.get(mycards=self.mycards).balance, 1)
@@ -0,0 +1,56 @@
+"""
+Tests for the load test commands.
+"""
+import io
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import LiveServerTestCase, override_settings
+
+from core import distance, geocoding
+from core.models import Card, Company, MyCardsHistory
+from receipt.tasks import process_receipt
+
+
+@override_settings(GEOCODER_BACKEND='stub', OCR_BACKEND='stub')
+class LoadTestTests(LiveServerTestCase):
+    """Test the shopper flow is driven against a live server."""
+
+    def setUp(self):
+        geocoding.clear()
+        caches[settings.CATALOGUE_CACHE_ALIAS].clear()
+
+    def test_seed_loadtest(self):
+        """Test companies are seeded with a card around the point."""
+        call_command('seed_loadtest', companies=5, points_needed=2,
+                     stdout=io.StringIO())
+
+        self.assertEqual(Company.objects.count(), 5)
+        self.assertEqual(
+            set(Card.objects.values_list('points_needed', flat=True)), {2})
+        for company in Company.objects.all():
+            self.assertLess(
+                abs(company.lat - geocoding.STUB_CENTRE[0]), 0.11)
+            self.assertTrue(company.geohash)
+
+    @patch('mycards.views.process_receipt')
+    def test_loadtest_completes_flows(self, queued):
+        """Test every shopper completes a card and endpoints are reported."""
+        queued.delay.side_effect = process_receipt
+        call_command('seed_loadtest', companies=3, points_needed=3,
+                     stdout=io.StringIO())
+        distance.companies.refresh()
+        out = io.StringIO()
+
+        call_command('loadtest', url=self.live_server_url, users=2,
+                     concurrency=1, stdout=out, stderr=io.StringIO())
+
+        report = out.getvalue()
+        self.assertIn('2/2 flows completed', report)
+        for endpoint in ('user create', 'token', 'shopper create',
+                         'company list', 'mycards create', 'receipt upload',
+                         'receipt processed', 'mycardshistory list'):
+            self.assertIn(endpoint, report)
+        self.assertEqual(MyCardsHistory.objects.count(), 2)
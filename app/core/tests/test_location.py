@@ -0,0 +1,135 @@
+"""Test for request location resolution."""
+
+import io
+import ipaddress
+import tempfile
+from unittest.mock import patch
+
+import requests
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from core import location, profiles
+from core.models import GeoIPRange, Shopper
+from core.management.commands import creating
+
+
+def make_request(user, path='/api/company/', ip='81.2.69.160'):
+    """Create and return a DRF request for user coming from ip."""
+    request = Request(APIRequestFactory().get(path, REMOTE_ADDR=ip))
+    request.user = user
+
+    return request
+
+
+class LocationTests(TestCase):
+    """Test resolving the location of a request."""
+
+    def setUp(self):
+        location.clear()
+        profiles.clear()
+        self.user = creating.create_user(email='location@example.com')
+        GeoIPRange.objects.create(
+            first_ip=int(ipaddress.ip_address('81.2.69.0')),
+            last_ip=int(ipaddress.ip_address('81.2.69.255')),
+            lat=52.2, long=0.12,
+        )
+
+    def test_query_parameters_first(self):
+        """Test client supplied coordinates are used first."""
+        creating.create_shopper(user=self.user)
+        request = make_request(self.user, '/api/company/?lat=50.1&lng=-5.5')
+
+        self.assertEqual(location.resolve(request), (50.1, -5.5))
+
+    def test_invalid_query_parameters_ignored(self):
+        """Test coordinates out of range are ignored."""
+        request = make_request(self.user, '/api/company/?lat=95&lng=abc')
+
+        self.assertEqual(location.resolve(request), (52.2, 0.12))
+
+    def test_shopper_coordinates(self):
+        """Test the shopper's stored location is used next."""
+        shopper = creating.create_shopper(user=self.user)
+        Shopper.objects.filter(pk=shopper.pk).update(lat='51.1', long='-1.1')
+
+        self.assertEqual(
+            location.resolve(make_request(self.user)), (51.1, -1.1))
+
+    def test_profile_shopper_coordinates(self):
+        """Test the location is the one of the profile's shopper."""
+        first = creating.create_shopper(user=self.user)
+        second = creating.create_shopper(user=self.user)
+        Shopper.objects.filter(pk=first.pk).update(lat='51.1', long='-1.1')
+        Shopper.objects.filter(pk=second.pk).update(lat='53.3', long='-2.2')
+
+        self.assertEqual(profiles.lookup(self.user.pk).shopper_id, first.pk)
+        self.assertEqual(
+            location.resolve(make_request(self.user)), (51.1, -1.1))
+
+    def test_client_ip_from_range_table(self):
+        """Test the client IP is located from the offline table."""
+        self.assertEqual(
+            location.resolve(make_request(self.user)), (52.2, 0.12))
+
+        with CaptureQueriesContext(connection) as queries:
+            location.resolve(make_request(self.user))
+
+        self.assertFalse(any(
+            GeoIPRange._meta.db_table in query['sql'] for query in queries))
+
+    def test_unknown_ip_falls_back_to_default(self):
+        """Test the default location is used for private addresses."""
+        request = make_request(self.user, ip='127.0.0.1')
+
+        with patch('core.location.session') as session:
+            self.assertEqual(
+                location.resolve(request), location.settings.DEFAULT_LOCATION)
+            session.assert_not_called()
+
+    @override_settings(GEOIP_REMOTE_URL='http://geoip.example/{ip}')
+    @patch('core.location.session')
+    def test_remote_lookup(self, session):
+        """Test the remote service is asked for unknown addresses."""
+        session.return_value.get.return_value.json.return_value = {
+            'latitude': 40.7, 'longitude': -74.0}
+        request = make_request(self.user, ip='8.8.8.8')
+
+        self.assertEqual(location.resolve(request), (40.7, -74.0))
+        session.return_value.get.assert_called_once_with(
+            'http://geoip.example/8.8.8.8',
+            timeout=location.settings.GEOIP_REMOTE_TIMEOUT,
+        )
+
+    @override_settings(GEOIP_REMOTE_URL='http://geoip.example/{ip}')
+    @patch('core.location.session')
+    def test_remote_failure_not_cached(self, session):
+        """Test a failed remote lookup is retried by the next request."""
+        session.return_value.get.side_effect = requests.Timeout
+        request = make_request(self.user, ip='8.8.8.8')
+
+        self.assertEqual(
+            location.resolve(request), location.settings.DEFAULT_LOCATION)
+
+        session.return_value.get.side_effect = None
+        session.return_value.get.return_value.json.return_value = {
+            'latitude': 40.7, 'longitude': -74.0}
+        self.assertEqual(location.resolve(request), (40.7, -74.0))
+
+    def test_load_geoip_clears_cache(self):
+        """Test reloading the range table forgets the located addresses."""
+        location.resolve(make_request(self.user))
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as csv:
+            csv.write('first_ip,last_ip,lat,long\n'
+                      '81.2.69.0,81.2.69.255,53.4,-2.2\n')
+            csv.flush()
+            call_command('load_geoip', csv.name, stdout=io.StringIO())
+
+        self.assertEqual(
+            location.resolve(make_request(self.user)), (53.4, -2.2))
@@ -0,0 +1,135 @@
+"""Test the metrics shared between processes."""
+
+import io
+import multiprocessing
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+
+
+def record_in_child():
+    """Count a job from another process."""
+    metrics.inc('receipt_jobs_total', status='accepted')
+
+
+class MmapedValuesTests(SimpleTestCase):
+    """Test the memory-mapped value files."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'values.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_values_read_back(self):
+        """Test added values are read from the file."""
+        values = metrics.MmapedValues(self.path)
+        values.add('a', 1)
+        values.add('b{x="y"}', 2.5)
+        values.add('a', 1)
+
+        self.assertEqual(
+            metrics.read_file(self.path), {'a': 2, 'b{x="y"}': 2.5})
+
+    def test_file_grows(self):
+        """Test the file grows past its initial size."""
+        values = metrics.MmapedValues(self.path)
+        for number in range(5000):
+            values.add(f'series_{number}', number)
+
+        read = metrics.read_file(self.path)
+        self.assertEqual(len(read), 5000)
+        self.assertEqual(read['series_4999'], 4999)
+
+    def test_file_reopened(self):
+        """Test a reopened file keeps its values."""
+        metrics.MmapedValues(self.path).add('a', 1)
+        metrics.MmapedValues(self.path).add('a', 1)
+
+        self.assertEqual(metrics.read_file(self.path), {'a': 2})
+
+
+class MetricsTests(TestCase):
+    """Test aggregating and exposing the metrics."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            METRICS_DIR=directory.name,
+            METRICS_ALLOWED_IPS=['127.0.0.1'])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_processes_summed(self):
+        """Test the values of every process are added up."""
+        metrics.inc('receipt_jobs_total', status='accepted')
+        child = multiprocessing.get_context('fork').Process(
+            target=record_in_child)
+        child.start()
+        child.join()
+
+        totals = metrics.collect()
+
+        self.assertEqual(
+            totals['receipt_jobs_total{status="accepted"}'], 2)
+
+    def test_exited_processes_merged(self):
+        """Test the files of exited processes become one archive file."""
+        metrics.inc('receipt_jobs_total', status='accepted')
+        for _ in range(3):
+            child = multiprocessing.get_context('fork').Process(
+                target=record_in_child)
+            child.start()
+            child.join()
+
+        metrics.merge_exited(metrics.service_dir())
+
+        self.assertEqual(len(os.listdir(metrics.service_dir())), 3)
+        self.assertEqual(
+            metrics.collect()['receipt_jobs_total{status="accepted"}'], 4)
+
+    def test_clear_metrics(self):
+        """Test the files of the previous run of the service are removed."""
+        metrics.inc('receipt_jobs_total', status='accepted')
+
+        call_command('clear_metrics', stdout=io.StringIO())
+
+        self.assertFalse(os.path.exists(metrics.service_dir()))
+        self.assertEqual(metrics.collect(), {})
+
+    def test_histogram_buckets(self):
+        """Test histogram buckets are cumulative and in order."""
+        metrics.observe('ocr_duration_ms', 300)
+        metrics.observe('ocr_duration_ms', 3)
+
+        text = metrics.exposition(metrics.collect(), {})
+
+        lines = text.splitlines()
+        self.assertEqual(lines[0], '# TYPE ocr_duration_ms histogram')
+        self.assertEqual(lines[1], 'ocr_duration_ms_bucket{le="5"} 1.0')
+        self.assertIn('ocr_duration_ms_bucket{le="+Inf"} 2.0', lines)
+        self.assertIn('ocr_duration_ms_count 2.0', lines)
+
+    def test_metrics_endpoint(self):
+        """Test requests are counted and exposed to allowed addresses."""
+        self.client.get(reverse('company-list'))
+
+        res = self.client.get(reverse('metrics'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(b'# TYPE http_request_duration_ms histogram',
+                      res.content)
+        self.assertIn(b'receipt_ocr_queue_depth 0.0', res.content)
+
+    def test_metrics_endpoint_restricted(self):
+        """Test other addresses cannot read the metrics."""
+        res = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(res.status_code, 403)
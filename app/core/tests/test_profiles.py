@@ -0,0 +1,64 @@
+"""Test the cached shopper and company ids of users."""
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import AnonymousUser
+
+from core import profiles
+from core.management.commands import creating
+
+
+class ProfileTests(TestCase):
+    """Test resolving the profile of a user."""
+
+    def setUp(self):
+        profiles.clear()
+        self.user = creating.create_user(email='profile@example.com')
+
+    def test_profile_cached(self):
+        """Test a profile is only queried once."""
+        shopper = creating.create_shopper(user=self.user)
+
+        self.assertEqual(
+            profiles.lookup(self.user.pk), (shopper.pk, None))
+        with self.assertNumQueries(0):
+            profiles.lookup(self.user.pk)
+
+    def test_profile_invalidated_on_save(self):
+        """Test creating a shopper or company refreshes the profile."""
+        self.assertEqual(profiles.lookup(self.user.pk), (None, None))
+
+        shopper = creating.create_shopper(user=self.user)
+        company = creating.create_company(user=self.user)
+
+        self.assertEqual(
+            profiles.lookup(self.user.pk), (shopper.pk, company.pk))
+
+    def test_profile_invalidated_on_delete(self):
+        """Test deleting a shopper refreshes the profile."""
+        shopper = creating.create_shopper(user=self.user)
+        profiles.lookup(self.user.pk)
+
+        shopper.delete()
+
+        self.assertEqual(profiles.lookup(self.user.pk), (None, None))
+
+    def test_empty_profile_not_cached(self):
+        """Test a user without shopper or company is queried again."""
+        self.assertEqual(profiles.lookup(self.user.pk), profiles.ANONYMOUS)
+
+        with self.assertNumQueries(2):
+            profiles.lookup(self.user.pk)
+
+    @override_settings(PROFILE_CACHE_TTL=0)
+    def test_profile_expires(self):
+        """Test a profile is queried again once it expires."""
+        profiles.lookup(self.user.pk)
+
+        with self.assertNumQueries(2):
+            profiles.lookup(self.user.pk)
+
+    def test_anonymous_profile(self):
+        """Test anonymous users have no shopper or company."""
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                profiles.for_user(AnonymousUser()), profiles.ANONYMOUS)
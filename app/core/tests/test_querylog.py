@@ -0,0 +1,41 @@
+"""
+Tests for the query inspector.
+"""
+from django.test import SimpleTestCase
+
+from core.querylog import QueryLog, normalize
+
+
+class QueryLogTests(SimpleTestCase):
+    """Test statements are grouped by template."""
+
+    def test_normalize_removes_literals(self):
+        """Test values and IN lists do not change the template."""
+        first = normalize(
+            "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'it''s'")
+        second = normalize('SELECT *  FROM t WHERE id IN (%s) AND name = %s')
+
+        self.assertEqual(first, second)
+
+    def test_repeated_templates(self):
+        """Test a statement run once per row is reported."""
+        log = QueryLog()
+        for pk in range(3):
+            log.record(f'SELECT * FROM card WHERE id = {pk}', 0.001)
+        log.record('SELECT * FROM company', 0.001)
+
+        repeated = log.repeated(3)
+
+        self.assertEqual(log.count, 4)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0].sql, 'SELECT * FROM card WHERE id = ?')
+
+    def test_slow_templates(self):
+        """Test only statements over the threshold are slow."""
+        log = QueryLog()
+        log.record('SELECT 1', 0.5)
+        log.record('SELECT * FROM card', 0.001)
+
+        lines = log.report(3, 100)
+
+        self.assertEqual(lines, ['slow 500.0ms: SELECT ?'])
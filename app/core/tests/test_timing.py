@@ -0,0 +1,71 @@
+"""Test the request timing middleware."""
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import timing
+from core.management.commands import creating
+
+
+class HistogramTests(SimpleTestCase):
+    """Test the latency histograms."""
+
+    def test_observe(self):
+        """Test observations land in cumulative buckets."""
+        histogram = timing.Histogram()
+        histogram.observe(3)
+        histogram.observe(30)
+
+        snapshot = histogram.snapshot()
+
+        self.assertEqual(snapshot['buckets'][5], 1)
+        self.assertEqual(snapshot['buckets'][50], 2)
+        self.assertEqual(snapshot['buckets']['+Inf'], 2)
+        self.assertEqual(snapshot['count'], 2)
+        self.assertEqual(snapshot['sum'], 33)
+
+    def test_timed_outside_request(self):
+        """Test timing a block outside a request records nothing."""
+        with timing.timed('ocr'):
+            pass
+
+
+class TimingMiddlewareTests(TestCase):
+    """Test timing API requests."""
+
+    def setUp(self):
+        timing.clear()
+        self.user = creating.create_staff(email='timing@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Test responses report their time and queries."""
+        res = self.client.get(reverse('shopper-list'))
+
+        self.assertIn('app;dur=', res['Server-Timing'])
+        self.assertIn('queries"', res['Server-Timing'])
+
+    def test_histograms_per_action(self):
+        """Test requests are recorded per viewset action."""
+        self.client.get(reverse('shopper-list'))
+        self.client.get(reverse('shopper-list'))
+
+        res = self.client.get(reverse('timing-stats'))
+
+        stats = res.data['ShopperViewset.list']
+        self.assertEqual(stats['total']['count'], 2)
+        self.assertGreater(stats['queries']['sum'], 0)
+
+    def test_geocode_timed(self):
+        """Test geocoding time is reported apart."""
+        res = self.client.post(reverse('shopper-list'), {
+            'first_name': 'Timed',
+            'last_name': 'Shopper',
+            'post_code': 'ZZ1 1ZZ',
+            'country': 'GB',
+            'phone_number': '07518946014',
+        })
+
+        self.assertIn('geocode;dur=', res['Server-Timing'])
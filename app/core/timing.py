@@ -0,0 +1,133 @@
+"""Per-request timings and in-process latency histograms."""
+
+import bisect
+import contextlib
+import threading
+import time
+from collections import defaultdict
+
+
+# Upper bounds in milliseconds of the histogram buckets.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+class Histogram:
+    """Count of observations per bucket with their total."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        """Record one observation in milliseconds."""
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self):
+        """Return the cumulative bucket counts with count and sum."""
+        cumulative = []
+        running = 0
+        for count in self.counts:
+            running += count
+            cumulative.append(running)
+
+        return {
+            'buckets': dict(zip(
+                ['+Inf' if bound == float('inf') else bound
+                 for bound in BUCKETS],
+                cumulative)),
+            'count': self.count,
+            'sum': self.total,
+        }
+
+
+histograms = defaultdict(lambda: defaultdict(Histogram))
+
+
+class RequestTimer:
+    """Time spent by one request, split by category."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+
+    def add(self, name, seconds):
+        """Add seconds spent in a category."""
+        self.durations[name] += seconds
+
+    def wrap_query(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing queries."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - start)
+            self.queries += 1
+
+    def header(self, total):
+        """Return the Server-Timing header value."""
+        metrics = [f'app;dur={total * 1000:.1f}']
+        metrics.append(
+            f'db;dur={self.durations["db"] * 1000:.1f};'
+            f'desc="{self.queries} queries"')
+        for name, seconds in self.durations.items():
+            if name != 'db':
+                metrics.append(f'{name};dur={seconds * 1000:.1f}')
+
+        return ', '.join(metrics)
+
+
+def start():
+    """Start timing the request of this thread."""
+    _local.timer = RequestTimer()
+
+    return _local.timer
+
+
+def stop():
+    """Stop timing the request of this thread."""
+    _local.timer = None
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request, if any."""
+    timer = getattr(_local, 'timer', None)
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timer is not None:
+            timer.add(name, time.perf_counter() - began)
+
+
+def observe(view, total, timer):
+    """Record a request of a view in the histograms."""
+    with _lock:
+        histograms[view]['total'].observe(total * 1000)
+        histograms[view]['queries'].observe(timer.queries)
+        for name, seconds in timer.durations.items():
+            histograms[view][name].observe(seconds * 1000)
+
+
+def snapshot():
+    """Return the histograms of every view."""
+    with _lock:
+        return {
+            view: {
+                name: histogram.snapshot()
+                for name, histogram in metrics.items()
+            }
+            for view, metrics in histograms.items()
+        }
+
+
+def clear():
+    """Forget every recorded request."""
+    with _lock:
+        histograms.clear()
@@ -0,0 +1,56 @@
+"""Views for the core APIs."""
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import geocoding, location, metrics, timing
+from core.models import ReceiptJob
+
+
+class GeocodeStatsView(APIView):
+    """Report the geocoding cache hits and misses of this process."""
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return the geocoding cache counters."""
+        return Response(geocoding.stats())
+
+
+class TimingStatsView(APIView):
+    """Report the request timing histograms of this process."""
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return the timing histograms of every view."""
+        return Response(timing.snapshot())
+
+
+class MetricsView(View):
+    """Expose the metrics of every process to the allowed addresses."""
+
+    def get(self, request):
+        """Return the metrics in the Prometheus text format."""
+        if location.client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+            return HttpResponseForbidden()
+        totals = metrics.collect()
+        lookups = sum(
+            value for key, value in totals.items()
+            if key.startswith('geocode_lookups_total'))
+        misses = totals.get('geocode_lookups_total{result="miss"}', 0)
+        gauges = {
+            'receipt_ocr_queue_depth': ReceiptJob.objects.filter(
+                status=ReceiptJob.PENDING).count(),
+            'geocode_cache_hit_ratio': (
+                (lookups - misses) / lookups if lookups else 0.0),
+        }
+
+        return HttpResponse(
+            metrics.exposition(totals, gauges),
+            content_type='text/plain; version=0.0.4')
@@ -2,7 +2,8 @@
 
 from rest_framework import serializers
 
-from core.models import MyCards
+from core import ledger
+from core.models import MyCards, ReceiptJob
 
 
 class MycardsSerializer(serializers.ModelSerializer):
@@ -16,11 +17,19 @@ class MycardsSerializer(serializers.ModelSerializer):
 
 class MycardsDetailSerializer(MycardsSerializer):
     """Serializer for MyCard detail view."""
+    points = serializers.SerializerMethodField()
 
     class Meta(MycardsSerializer.Meta):
         fields = MycardsSerializer.Meta.fields + [
             'points', 'code']
 
+    def get_points(self, obj):
+        """Return the balance of the card, annotated or from the ledger."""
+        if hasattr(obj, 'balance'):
+            return obj.balance
+
+        return ledger.balance(obj.pk)
+
     def create(self, validated_data):
         return MyCards.objects.create(**validated_data)
 
@@ -30,3 +39,16 @@ class RewardSerializer(serializers.ModelSerializer):
     class Meta:
         model = MyCards
         fields = ('code',)
+
+
+class ReceiptUploadSerializer(serializers.Serializer):
+    """Serializer for the receipt image uploaded to a MyCards."""
+    image = serializers.ImageField()
+
+
+class ReceiptJobSerializer(serializers.ModelSerializer):
+    """Serializer for receipt processing jobs."""
+    class Meta:
+        model = ReceiptJob
+        fields = ['id', 'mycards', 'status', 'detail', 'created', 'updated']
+        read_only_fields = fields
@@ -7,9 +7,14 @@ from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import MyCards
+from unittest.mock import patch
+
+from django.core.files import File
+
+from core.models import MyCards, ReceiptJob
 
 from core.management.commands import creating
+from core.testing import QueryCountMixin
 
 import datetime
 
@@ -24,6 +29,11 @@ def detail_url(shopper_id, mycards_id):
     return reverse('mycards-detail', args=[shopper_id, mycards_id])
 
 
+def job_url(shopper_id, mycards_id, job_id):
+    """create and return a receipt job URL."""
+    return reverse('mycards-job', args=[shopper_id, mycards_id, job_id])
+
+
 class PublicCardAPITests(TestCase):
     """Test unauthenticated API requests"""
 
@@ -37,7 +47,7 @@ class PublicCardAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateCardAPITests(TestCase):
+class PrivateCardAPITests(QueryCountMixin, TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
@@ -80,3 +90,92 @@ class PrivateCardAPITests(TestCase):
         mycards = MyCards.objects.get(id=res.data['id'])
         self.assertEqual(mycards.points, 1)
         self.assertEqual(mycards.shopper.pk, self.shopper.pk)
+
+    @patch('mycards.views.process_receipt')
+    def test_upload_receipt_queued(self, process_receipt):
+        """Test uploading a receipt returns a job to poll."""
+        mycards = MyCards.objects.create(shopper=self.shopper, card=self.card)
+        image_file = creating.create_image(
+            content='Company Sample', name='receipt.jpg')
+
+        url = detail_url(self.shopper.pk, mycards.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.put(url, {'image': image_file},
+                                  format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], ReceiptJob.PENDING)
+        process_receipt.delay.assert_called_once_with(res.data['id'])
+        mycards.refresh_from_db()
+        self.assertTrue(mycards.image.name.endswith('.jpg'))
+        job = ReceiptJob.objects.get(pk=res.data['id'])
+        self.assertEqual(job.image.name, mycards.image.name)
+        self.assertEqual(mycards.points, 1)
+
+        res = self.client.get(job_url(self.shopper.pk, mycards.pk,
+                                      res.data['id']))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], ReceiptJob.PENDING)
+
+    @patch('mycards.views.process_receipt')
+    def test_upload_without_image_rejected(self, process_receipt):
+        """Test uploading without an image is a bad request."""
+        mycards = MyCards.objects.create(shopper=self.shopper, card=self.card)
+
+        res = self.client.put(detail_url(self.shopper.pk, mycards.pk), {},
+                              format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        process_receipt.delay.assert_not_called()
+
+    @patch('receipt.ocr.read_text')
+    @patch('mycards.views.process_receipt')
+    def test_duplicate_image_rejected_early(self, process_receipt,
+                                            read_text):
+        """Test uploading an image already used is rejected at once."""
+        read_text.return_value = 'Company Sample 01/02/2023 10:11:12'
+        mycards = creating.create_mycards(
+            self.shopper, self.card,
+            File(creating.create_image(content='Company Sample',
+                                       name='r.jpg')))
+        image_file = creating.create_image(
+            content='Company Sample', name='receipt.jpg')
+
+        url = detail_url(self.shopper.pk, mycards.pk)
+        res = self.client.put(url, {'image': image_file}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], ReceiptJob.DUPLICATE)
+        process_receipt.delay.assert_not_called()
+        read_text.assert_called_once()
+
+    def test_list_mycards_paginated(self):
+        """Test mycards are listed newest first one page at a time."""
+        mycards = [
+            MyCards.objects.create(shopper=self.shopper, card=self.card)
+            for _ in range(3)
+        ]
+
+        res = self.client.get(mycards_url(self.shopper.pk), {'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [mycards[2].id, mycards[1].id])
+        self.assertNotIn('count', res.data)
+
+        res = self.client.get(res.data['next'])
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [mycards[0].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_list_mycards_query_budget(self):
+        """Test listing mycards runs a fixed number of queries."""
+        for _ in range(5):
+            MyCards.objects.create(shopper=self.shopper, card=self.card)
+
+        with self.assertQueryBudget(3):
+            res = self.client.get(mycards_url(self.shopper.pk))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,44 +1,55 @@
 """Views for the mycards APIs."""
 
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
-import re
-import pytesseract
 
-from datetime import datetime
 from rest_framework.decorators import action
-from PIL import Image
-
-import random
 
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import MyCards, Shopper, MyCardsHistory, Receipt
+from core import ledger, metrics
+from core.authentication import CachedTokenAuthentication
+from core.conditional import ConditionalGetMixin
+from core.pagination import NewestFirstCursorPagination
+from core.models import MyCards, PointEvent, ReceiptJob
 from mycards import serializers
+from receipt import services
+from receipt.tasks import check_read_receipt, process_receipt
 
 
-def CodeGenerator():
-    nums = [random.randrange(1, 9) for _ in range(6)]
-    code = ''.join(str(num) for num in nums)
-    return code
-
-
-class MycardsViewSet(viewsets.ModelViewSet):
+class MycardsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """View for manage card APIs."""
 
     serializer_class = serializers.MycardsDetailSerializer
     queryset = MyCards.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NewestFirstCursorPagination
+    # A cursor page is validated by its own rows, as aggregating every
+    # row of the shopper would make deep pages cost more again.
+    conditional_page_actions = ('list',)
 
     def get_queryset(self):
         """Retrieve Myards for authenticated user."""
-        shoppers = list(Shopper.objects.all().filter(
-            user=self.request.user).values_list('id'))
+        queryset = self.queryset.filter(
+            shopper=self.request.profile.shopper_id).order_by('-id')
+        if self.action == 'list':
+            return queryset
+
+        return ledger.with_balance(queryset)
 
-        return self.queryset.filter(shopper=shoppers[0]).order_by('-id')
+    def get_conditional_querysets(self):
+        """Make cards depend on their point events too."""
+        mycards = self.get_conditional_queryset()
+
+        return [
+            (mycards, 'updated'),
+            (PointEvent.objects.filter(mycards__in=mycards), 'created'),
+        ]
 
     def get_serializer_class(self):
         """Get serializer depending on the action"""
@@ -51,51 +62,45 @@ class MycardsViewSet(viewsets.ModelViewSet):
 
     def update(self, request, pk=None, *args, **kwargs):
         '''
-        update the image, check if image contains the
-        name of the business if so, increase the points by 1
+        Store the receipt image and queue it to be checked,
+        returning the job that reports the outcome.
         '''
-        myCards_obj = MyCards.objects.get(id=pk)
-        data = request.data
-        myCards_obj.image = data["image"]
-        myCards_obj.save()
-        image = myCards_obj.image
-        result = pytesseract.image_to_string(Image.open(image))
-        company = myCards_obj.card.company.company_name
-        total_points = myCards_obj.card.points_needed
-        date_pattern = r"\d{2}[/-]\d{2}[/-]\d{4}"
-        hour_pattern = r"\d{2}[:]\d{2}[:]\d{2}"
-        date = re.findall(date_pattern, result)
-        hour = re.findall(hour_pattern, result)
-        # validade image and add a point if everything is ok
-        key = company + str(date) + str(hour)
-
-        if company in result:
-            if not Receipt.objects.filter(receipt_key=key).exists:
-                raise 'Receipt already in use'
-            else:
-                Receipt.objects.create(
-                    receipt_key=key,
-                )
-                myCards_obj.points += 1
-                # check if all the points have been acumulated,
-                # send an email with a congrats message and generates a
-                # code to be used by the custumer
-                if myCards_obj.points == total_points:
-                    myCards_obj.points = 0
-                    # card_completed.delay(myCards_obj.profile.user.pk)
-                    MyCardsHistory.objects.create(
-                        company=myCards_obj.card.company,
-                        shopper=myCards_obj.shopper,
-                        card=myCards_obj.card,
-                        finalized=datetime.now(),
-                        code=CodeGenerator(),
-                        )
-
-        else:
-            return Response("Please take a new picture")
-
-        myCards_obj.save()
-        serializer = serializers.MycardsSerializer(myCards_obj)
+        myCards_obj = self.get_object()
+        upload = serializers.ReceiptUploadSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        image = upload.validated_data['image']
+        # An image read before is rejected now if it cannot earn a point
+        receipt = services.cached_receipt(image, myCards_obj.card.company)
+        if receipt is not None:
+            outcome = check_read_receipt(receipt)
+            if outcome is not None:
+                job = ReceiptJob.objects.create(
+                    mycards=myCards_obj, status=outcome[0],
+                    detail=outcome[1])
+                metrics.inc('receipt_jobs_total', status=job.status)
+                serializer = serializers.ReceiptJobSerializer(job)
+                return Response(serializer.data)
+
+        myCards_obj.image.save(image.name, image, save=False)
+        MyCards.objects.filter(id=pk).update(
+            image=myCards_obj.image.name, updated=timezone.now())
+        # The job reads this image even if another upload replaces it
+        job = ReceiptJob.objects.create(
+            mycards=myCards_obj, image=myCards_obj.image.name)
+        transaction.on_commit(lambda: process_receipt.delay(str(job.pk)))
+
+        serializer = serializers.ReceiptJobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=True, methods=['GET'],
+        url_path=r'jobs/(?P<job_id>[0-9a-f-]{36})', url_name='job',
+    )
+    def job(self, request, pk=None, job_id=None, *args, **kwargs):
+        """Return the status of a receipt processing job."""
+        job = get_object_or_404(
+            ReceiptJob, pk=job_id, mycards=self.get_object())
+        serializer = serializers.ReceiptJobSerializer(job)
         return Response(serializer.data)
 
     @action(detail=True, methods=['GET'])
@@ -0,0 +1,72 @@
+"""Test for MyCardsHistory APIs."""
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import MyCardsHistory
+from core.management.commands import creating
+from core.testing import QueryCountMixin
+
+
+def mycardshistory_url(shopper_pk):
+    """Create and return the mycardshistory list URL."""
+    return reverse('mycardshistory-list', args=[shopper_pk])
+
+
+class PrivateMycardsHistoryAPITests(QueryCountMixin, TestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = creating.create_user(email='history@example.com')
+        self.client.force_authenticate(self.user)
+        self.shopper = creating.create_shopper(user=self.user)
+        staff = creating.create_staff(email='historystaff@example.com')
+        self.card = creating.create_card(
+            company=creating.create_company(user=staff))
+
+    def test_history_paginated(self):
+        """Test the history is listed newest first one page at a time."""
+        history = [
+            MyCardsHistory.objects.create(
+                shopper=self.shopper, card=self.card,
+                company=self.card.company, code=f'CODE{number}')
+            for number in range(3)
+        ]
+
+        res = self.client.get(
+            mycardshistory_url(self.shopper.pk), {'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [history[2].id, history[1].id])
+
+        res = self.client.get(res.data['next'])
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [history[0].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_history_limited_to_shopper(self):
+        """Test the history of other shoppers is not listed."""
+        other = creating.create_shopper(
+            user=creating.create_user(email='otherhistory@example.com'))
+        MyCardsHistory.objects.create(
+            shopper=other, card=self.card, company=self.card.company)
+
+        res = self.client.get(mycardshistory_url(self.shopper.pk))
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_history_query_budget(self):
+        """Test listing the history runs a fixed number of queries."""
+        for _ in range(5):
+            MyCardsHistory.objects.create(
+                shopper=self.shopper, card=self.card,
+                company=self.card.company)
+
+        with self.assertQueryBudget(3):
+            res = self.client.get(mycardshistory_url(self.shopper.pk))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
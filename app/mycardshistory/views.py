@@ -1,10 +1,11 @@
 """Views for the mycards APIs."""
 
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import MyCardsHistory, Shopper
+from core.authentication import CachedTokenAuthentication
+from core.pagination import NewestFirstCursorPagination
+from core.models import MyCardsHistory
 from mycardshistory import serializers
 
 
@@ -13,15 +14,14 @@ class MycardsHistoryViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.MycardsHistoryDetailSerializer
     queryset = MyCardsHistory.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NewestFirstCursorPagination
 
     def get_queryset(self):
         """Retrieve Myards for authenticated user."""
-        shoppers = list(Shopper.objects.all().filter(
-            user=self.request.user).values_list('id'))
-
-        return self.queryset.filter(shopper=shoppers[0]).order_by('-id')
+        return self.queryset.filter(
+            shopper=self.request.profile.shopper_id).order_by('-id')
 
     def perform_create(self, serializer):
         """Create a new recipe."""
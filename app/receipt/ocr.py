@@ -0,0 +1,116 @@
+"""OCR engine keeping the tesseract model loaded between receipts."""
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytesseract
+from PIL import Image
+
+from django.conf import settings
+
+from core import metrics, timing
+
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover
+    tesserocr = None
+
+
+# PNG text chunk holding what synthetic receipts say, for the stub OCR.
+STUB_TEXT_KEY = 'receipt'
+
+_local = threading.local()
+
+
+def handle(lang):
+    """Return this thread's tesseract handle, loading the model once."""
+    api = getattr(_local, 'api', None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=lang)
+        _local.api = api
+
+    return api
+
+
+def read_text(image, lang):
+    """Return the text of a PIL image read in this process."""
+    if tesserocr is None:
+        return pytesseract.image_to_string(image, lang=lang)
+    api = handle(lang)
+    api.SetImage(image)
+
+    return api.GetUTF8Text()
+
+
+def stub_text(image):
+    """Return the text a synthetic receipt carries, without reading it."""
+    text = Image.open(image).info.get(STUB_TEXT_KEY, '')
+    image.seek(0)
+
+    return text
+
+
+def warm_up(lang):
+    """Load the model when a pool worker starts."""
+    if tesserocr is not None:
+        handle(lang)
+
+
+class OcrEngine:
+    """
+    Read images in this process, or in a pool of long-lived worker
+    processes when pool_size is above zero. With tesserocr installed
+    every process loads the language model once; otherwise each read
+    falls back to a pytesseract subprocess.
+    """
+
+    def __init__(self, pool_size=None, lang=None):
+        self.pool_size = pool_size
+        self.lang = lang
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_pool_size(self):
+        if self.pool_size is None:
+            return settings.OCR_POOL_SIZE
+        return self.pool_size
+
+    def get_lang(self):
+        return self.lang or settings.OCR_LANG
+
+    def get_executor(self):
+        """Start the worker pool on first use."""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.get_pool_size(),
+                    initializer=warm_up,
+                    initargs=(self.get_lang(),),
+                )
+
+        return self.executor
+
+    def image_to_string(self, image):
+        """Return the text of a PIL image."""
+        began = time.perf_counter()
+        try:
+            with timing.timed('ocr'):
+                if self.get_pool_size() == 0:
+                    return read_text(image, self.get_lang())
+
+                return self.get_executor().submit(
+                    read_text, image, self.get_lang()).result()
+        finally:
+            metrics.observe(
+                'ocr_duration_ms', (time.perf_counter() - began) * 1000)
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+engine = OcrEngine()
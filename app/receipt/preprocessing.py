@@ -0,0 +1,77 @@
+"""Prepare receipt photos for tesseract."""
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+
+
+CROP_MARGIN = 10
+
+
+def otsu_threshold(image):
+    """Return the grey level best separating ink from paper."""
+    histogram = image.histogram()
+    total = sum(histogram)
+    weighted_total = sum(
+        level * count for level, count in enumerate(histogram))
+    background = 0
+    weighted_background = 0
+    best_level = 127
+    best_variance = 0.0
+
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (
+            weighted_total - weighted_background) / foreground
+        variance = background * foreground * (
+            mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_level = level
+
+    return best_level
+
+
+def crop_to_text(image):
+    """Crop a black on white image to its text with a small margin."""
+    box = ImageOps.invert(image).getbbox()
+    if box is None:
+        return image
+    left, top, right, bottom = box
+
+    return image.crop((
+        max(left - CROP_MARGIN, 0),
+        max(top - CROP_MARGIN, 0),
+        min(right + CROP_MARGIN, image.width),
+        min(bottom + CROP_MARGIN, image.height),
+    ))
+
+
+def prepare(image_file, max_side=None, crop=True):
+    """
+    Return the receipt photo upright, in greyscale, no larger than
+    max_side pixels, binarized and cropped to the text.
+    """
+    max_side = max_side or settings.OCR_MAX_SIDE
+    image = Image.open(image_file)
+    # Let the JPEG decoder skip detail we are about to throw away
+    image.draft('L', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('L')
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    image = ImageOps.autocontrast(image)
+    threshold = otsu_threshold(image)
+    image = image.point(lambda level: 255 if level > threshold else 0)
+    if crop:
+        image = crop_to_text(image)
+
+    return image
@@ -0,0 +1,194 @@
+"""Receipt processing shared by the MyCards model and the workers."""
+
+import datetime
+import hashlib
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+
+from PIL import Image
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from receipt import preprocessing
+from receipt.ocr import engine, stub_text
+
+
+DATE_PATTERN = r"\d{2}[/-]\d{2}[/-]\d{4}"
+HOUR_PATTERN = r"\d{2}[:]\d{2}[:]\d{2}"
+TOTAL_PATTERN = r"total\D{0,10}?(\d+[.,]\d{2})"
+EVICTION_BATCH = 1000
+
+
+@dataclass
+class ReceiptResult:
+    """What was read from a receipt image."""
+    text: str
+    company_id: int
+    date: datetime.date
+    time: datetime.time
+    total: Decimal
+    merchant_match: bool
+    fingerprint: int
+
+
+def parse_date(text):
+    """Return the first day/month/year date of a text, if any."""
+    for found in re.findall(DATE_PATTERN, text):
+        try:
+            return datetime.datetime.strptime(
+                found.replace('-', '/'), '%d/%m/%Y').date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def parse_time(text):
+    """Return the first hour:minute:second time of a text, if any."""
+    for found in re.findall(HOUR_PATTERN, text):
+        try:
+            return datetime.datetime.strptime(found, '%H:%M:%S').time()
+        except ValueError:
+            continue
+
+    return None
+
+
+def parse_total(text):
+    """Return the amount following the word total, if any."""
+    found = re.search(TOTAL_PATTERN, text, re.IGNORECASE)
+    if found is None:
+        return None
+
+    return Decimal(found.group(1).replace(',', '.'))
+
+
+def fingerprint(company_id, date, time, total):
+    """Return the signed 64-bit hash identifying a receipt."""
+    key = f'{company_id}|{date}|{time}|{total}'.encode()
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def fingerprint_without_total(receipt):
+    """
+    Return the fingerprint of a receipt with its total left out, which
+    receipts migrated from the old keys and those whose total could not
+    be read were recorded with.
+    """
+    return fingerprint(receipt.company_id, receipt.date, receipt.time, None)
+
+
+def parse_receipt(text, company):
+    """Extract the receipt details from its text."""
+    date = parse_date(text)
+    time = parse_time(text)
+    total = parse_total(text)
+
+    return ReceiptResult(
+        text=text,
+        company_id=company.pk,
+        date=date,
+        time=time,
+        total=total,
+        merchant_match=company.company_name in text,
+        fingerprint=fingerprint(company.pk, date, time, total),
+    )
+
+
+def image_digest(image):
+    """Return the SHA-256 hex digest of the bytes of an image file."""
+    sha256 = hashlib.sha256()
+    for chunk in image.chunks():
+        sha256.update(chunk)
+    image.seek(0)
+
+    return sha256.hexdigest()
+
+
+def cached_text(digest):
+    """
+    Return the text read before from the image with digest, if any,
+    marking it used at most once every OCR_CACHE_TOUCH_INTERVAL seconds.
+    """
+    from core.models import OcrResult
+
+    found = OcrResult.objects.filter(
+        digest=digest).values_list('text', 'last_used').first()
+    if found is None:
+        return None
+    text, last_used = found
+    now = timezone.now()
+    if now - last_used >= datetime.timedelta(
+            seconds=settings.OCR_CACHE_TOUCH_INTERVAL):
+        OcrResult.objects.filter(digest=digest).update(last_used=now)
+
+    return text
+
+
+def cache_text(digest, text):
+    """Remember the text of an image."""
+    from core.models import OcrResult
+
+    try:
+        with transaction.atomic():
+            OcrResult.objects.create(digest=digest, text=text)
+    except IntegrityError:
+        # The same image was read concurrently.
+        pass
+
+
+def evict_cached_texts():
+    """
+    Delete the least recently used texts past OCR_CACHE_MAX_ENTRIES in
+    batches and return how many were deleted.
+    """
+    from core.models import OcrResult
+
+    cutoff = list(OcrResult.objects.order_by('-last_used').values_list(
+        'last_used', flat=True)[
+            settings.OCR_CACHE_MAX_ENTRIES:
+            settings.OCR_CACHE_MAX_ENTRIES + 1])
+    if not cutoff:
+        return 0
+
+    total = 0
+    while True:
+        stale = list(OcrResult.objects.filter(
+            last_used__lte=cutoff[0]).values_list(
+                'pk', flat=True)[:EVICTION_BATCH])
+        if not stale:
+            return total
+        total += OcrResult.objects.filter(pk__in=stale).delete()[0]
+
+
+def ocr(image):
+    """Return the text of an image, reading it only the first time."""
+    digest = image_digest(image)
+    text = cached_text(digest)
+    if text is None:
+        if settings.OCR_BACKEND == 'stub':
+            text = stub_text(image)
+        elif settings.OCR_PREPROCESS:
+            text = engine.image_to_string(preprocessing.prepare(image))
+        else:
+            text = engine.image_to_string(Image.open(image))
+        cache_text(digest, text)
+
+    return text
+
+
+def cached_receipt(image, company):
+    """Return the details of an image read before, without reading it."""
+    text = cached_text(image_digest(image))
+
+    return None if text is None else parse_receipt(text, company)
+
+
+def read_receipt(image, company):
+    """OCR a receipt image once and return its details."""
+    return parse_receipt(ocr(image), company)
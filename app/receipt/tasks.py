@@ -0,0 +1,88 @@
+"""Background tasks for the receipt uploads."""
+
+import random
+
+from celery import shared_task
+from django.db import transaction
+
+from core import ledger, metrics
+from core.models import MyCardsHistory, Receipt, ReceiptJob
+from receipt import services
+
+
+def CodeGenerator():
+    nums = [random.randrange(1, 9) for _ in range(6)]
+    code = ''.join(str(num) for num in nums)
+    return code
+
+
+def check_read_receipt(receipt):
+    """
+    Return the (status, detail) of a receipt that cannot earn a point,
+    or None if it can.
+    """
+    if not receipt.merchant_match:
+        return ReceiptJob.REJECTED, 'Please take a new picture'
+    if Receipt.objects.filter(
+            company_id=receipt.company_id,
+            fingerprint__in=[
+                receipt.fingerprint,
+                services.fingerprint_without_total(receipt),
+            ]).exists():
+        return ReceiptJob.DUPLICATE, 'Receipt already in use'
+
+    return None
+
+
+def check_receipt(job):
+    """
+    Read the receipt image, check if it contains the name of the
+    business and if so increase the points by 1.
+    """
+    myCards_obj = job.mycards
+    # Jobs queued before they recorded their image read the card's
+    image = job.image or myCards_obj.image
+    receipt = services.read_receipt(image, myCards_obj.card.company)
+    total_points = myCards_obj.card.points_needed
+
+    if not receipt.merchant_match:
+        return ReceiptJob.REJECTED, 'Please take a new picture'
+
+    with transaction.atomic():
+        receipt_id = Receipt.objects.record(receipt)
+        if receipt_id is None:
+            return ReceiptJob.DUPLICATE, 'Receipt already in use'
+        points = ledger.add_point(myCards_obj.pk, total_points, receipt_id)
+        # the points start over once they have all been acumulated,
+        # generate a code to be used by the custumer
+        if points == 0:
+            MyCardsHistory.objects.create(
+                company=myCards_obj.card.company,
+                shopper=myCards_obj.shopper,
+                card=myCards_obj.card,
+                code=CodeGenerator(),
+                )
+
+    return ReceiptJob.ACCEPTED, ''
+
+
+@shared_task
+def process_receipt(job_id):
+    """Process an uploaded receipt and record the outcome on its job."""
+    job = ReceiptJob.objects.select_related(
+        'mycards__card__company', 'mycards__shopper').get(pk=job_id)
+    try:
+        job.status, job.detail = check_receipt(job)
+    except Exception:
+        job.status = ReceiptJob.FAILED
+        job.save(update_fields=['status', 'updated'])
+        metrics.inc('receipt_jobs_total', status=job.status)
+        raise
+    job.save(update_fields=['status', 'detail', 'updated'])
+    metrics.inc('receipt_jobs_total', status=job.status)
+
+
+@shared_task
+def evict_ocr_cache():
+    """Bound the OCR cache to its least recently used entries."""
+    return services.evict_cached_texts()
@@ -0,0 +1,77 @@
+"""Test for the OCR engine."""
+
+import io
+from unittest import skipIf
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.test import SimpleTestCase, override_settings
+
+from core.management.commands import creating
+from receipt import ocr
+
+
+class OcrEngineTests(SimpleTestCase):
+    """Test reading images with the OCR engine."""
+
+    @patch('receipt.ocr.tesserocr', None)
+    @patch('receipt.ocr.pytesseract.image_to_string', return_value='text')
+    def test_in_process(self, image_to_string):
+        """Test images are read in this process without a pool."""
+        image = Image.new('L', (10, 10))
+
+        self.assertEqual(
+            ocr.OcrEngine(pool_size=0).image_to_string(image), 'text')
+        image_to_string.assert_called_once_with(image, lang='eng')
+
+    @patch('receipt.ocr.tesserocr')
+    def test_handle_loaded_once(self, tesserocr):
+        """Test the tesseract handle is reused between images."""
+        tesserocr.PyTessBaseAPI.return_value.GetUTF8Text.return_value = 'a'
+        ocr._local.api = None
+        engine = ocr.OcrEngine(pool_size=0)
+
+        engine.image_to_string(Image.new('L', (10, 10)))
+        engine.image_to_string(Image.new('L', (10, 10)))
+
+        tesserocr.PyTessBaseAPI.assert_called_once_with(lang='eng')
+        ocr._local.api = None
+
+    @patch('receipt.ocr.pytesseract.image_to_string')
+    @patch('receipt.ocr.tesserocr')
+    def test_tesserocr_reads_image(self, tesserocr, image_to_string):
+        """Test tesserocr reads the image when it is installed."""
+        api = tesserocr.PyTessBaseAPI.return_value
+        api.GetUTF8Text.return_value = 'text'
+        ocr._local.api = None
+        self.addCleanup(setattr, ocr._local, 'api', None)
+        image = Image.new('L', (10, 10))
+
+        self.assertEqual(ocr.read_text(image, 'eng'), 'text')
+        api.SetImage.assert_called_once_with(image)
+        image_to_string.assert_not_called()
+
+    @skipIf(ocr.tesserocr is None, 'tesserocr is not installed')
+    def test_tesserocr_text(self):
+        """Test the tesserocr engine reads a receipt's text."""
+        ocr._local.api = None
+        self.addCleanup(setattr, ocr._local, 'api', None)
+        image = Image.open(io.BytesIO(creating.create_receipt('Company')))
+
+        self.assertIn('Company', ocr.read_text(image, 'eng'))
+
+    @override_settings(OCR_POOL_SIZE=1)
+    def test_pool(self):
+        """Test images are read by a long-lived worker process."""
+        engine = ocr.OcrEngine()
+        self.addCleanup(engine.shutdown)
+        image = Image.open(creating.create_image('Company Sample', 'r.jpg'))
+
+        text = engine.image_to_string(image)
+        workers = set(engine.get_executor()._processes)
+        engine.image_to_string(image)
+
+        self.assertEqual(text, ocr.read_text(image, 'eng'))
+        self.assertEqual(len(workers), 1)
+        self.assertEqual(set(engine.get_executor()._processes), workers)
@@ -0,0 +1,52 @@
+"""Test for the receipt photo preprocessing."""
+
+import io
+
+from PIL import Image, ImageDraw
+
+from django.test import SimpleTestCase
+
+from receipt import preprocessing
+
+
+def receipt_photo(size=(400, 200), orientation=None):
+    """Create and return a JPEG receipt photo."""
+    image = Image.new('RGB', size, color=(230, 225, 210))
+    ImageDraw.Draw(image).text((100, 80), 'Company Sample', fill=(20, 20, 20))
+    buffer = io.BytesIO()
+    if orientation is None:
+        image.save(buffer, 'jpeg')
+    else:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(buffer, 'jpeg', exif=exif.tobytes())
+    buffer.seek(0)
+
+    return buffer
+
+
+class PrepareTests(SimpleTestCase):
+    """Test preparing photos for the OCR."""
+
+    def test_binarized_and_cropped(self):
+        """Test the photo is black on white and cropped to the text."""
+        image = preprocessing.prepare(receipt_photo())
+
+        self.assertEqual(image.mode, 'L')
+        self.assertEqual(set(image.getdata()), {0, 255})
+        self.assertLess(image.width, 400)
+        self.assertLess(image.height, 200)
+
+    def test_large_photo_downscaled(self):
+        """Test a large photo is shrunk to the maximum side."""
+        image = preprocessing.prepare(
+            receipt_photo(size=(4000, 3000)), max_side=1000, crop=False)
+
+        self.assertEqual(max(image.size), 1000)
+
+    def test_exif_orientation_applied(self):
+        """Test a photo taken sideways is turned upright."""
+        image = preprocessing.prepare(
+            receipt_photo(orientation=6), crop=False)
+
+        self.assertEqual(image.size, (200, 400))
@@ -0,0 +1,204 @@
+"""Test for the receipt processing service."""
+
+from unittest.mock import patch
+
+from django.core.files import File
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+import datetime
+import io
+from decimal import Decimal
+
+from core.models import Company, MyCards, OcrResult, Receipt
+from core.management.commands import creating
+from receipt import preprocessing, services
+
+
+RECEIPT_TEXT = 'Company Sample\n01/02/2023 10:11:12\nTotal 2.00'
+COMPANY = Company(pk=1, company_name='Company Sample')
+
+
+class ParseReceiptTests(SimpleTestCase):
+    """Test extracting the receipt details from its text."""
+
+    def test_parse_receipt(self):
+        """Test the date, time and merchant are extracted."""
+        result = services.parse_receipt(RECEIPT_TEXT, COMPANY)
+
+        self.assertEqual(result.date, datetime.date(2023, 2, 1))
+        self.assertEqual(result.time, datetime.time(10, 11, 12))
+        self.assertEqual(result.total, Decimal('2.00'))
+        self.assertTrue(result.merchant_match)
+        self.assertEqual(result.fingerprint, services.fingerprint(
+            1, datetime.date(2023, 2, 1), datetime.time(10, 11, 12),
+            Decimal('2.00')))
+
+    def test_fingerprint_fits_64_bits(self):
+        """Test the fingerprint fits a signed 64-bit column."""
+        for company_id in range(50):
+            value = services.fingerprint(company_id, None, None, None)
+            self.assertTrue(-2 ** 63 <= value < 2 ** 63)
+
+    def test_parse_receipt_other_merchant(self):
+        """Test a receipt from another merchant does not match."""
+        result = services.parse_receipt('Another shop 31/02/2023', COMPANY)
+
+        self.assertFalse(result.merchant_match)
+        self.assertIsNone(result.date)
+
+
+@patch('receipt.ocr.read_text',
+       return_value=RECEIPT_TEXT)
+class MyCardsReceiptTests(TestCase):
+    """Test MyCards reads each uploaded image once."""
+
+    def setUp(self):
+        user = creating.create_user(email='services@example.com')
+        staff = creating.create_staff(email='servicesstaff@example.com')
+        self.shopper = creating.create_shopper(user=user)
+        self.card = creating.create_card(
+            company=creating.create_company(user=staff))
+
+    def test_image_read_once(self, read_text):
+        """Test saving again without a new image does not read it."""
+        mycards = creating.create_mycards(
+            self.shopper, self.card,
+            File(creating.create_image('', 'receipt.jpg')))
+        mycards = MyCards.objects.get(pk=mycards.pk)
+        mycards.points = 2
+        mycards.save()
+
+        read_text.assert_called_once()
+        self.assertEqual(Receipt.objects.count(), 1)
+
+    def test_receipt_read_by_caller(self, read_text):
+        """Test a receipt read by the caller is not read again."""
+        receipt = services.parse_receipt(RECEIPT_TEXT, self.card.company)
+        mycards = MyCards(shopper=self.shopper, card=self.card,
+                          image=File(creating.create_image('', 'receipt.jpg')))
+        mycards.save(receipt=receipt)
+
+        read_text.assert_not_called()
+        self.assertTrue(
+            Receipt.objects.filter(fingerprint=receipt.fingerprint).exists())
+
+
+@patch('receipt.ocr.read_text',
+       return_value=RECEIPT_TEXT)
+class OcrCacheTests(TestCase):
+    """Test OCR results are cached by image content."""
+
+    def test_same_bytes_read_once(self, read_text):
+        """Test an image with the same bytes is only read once."""
+        image = File(creating.create_image('receipt', 'receipt.jpg'))
+
+        self.assertEqual(services.ocr(image), RECEIPT_TEXT)
+        self.assertEqual(services.ocr(image), RECEIPT_TEXT)
+
+        read_text.assert_called_once()
+        self.assertEqual(OcrResult.objects.count(), 1)
+
+    def test_cached_receipt(self, read_text):
+        """Test only images read before have cached details."""
+        image = File(creating.create_image('receipt', 'receipt.jpg'))
+        self.assertIsNone(services.cached_receipt(image, COMPANY))
+
+        services.ocr(image)
+        receipt = services.cached_receipt(image, COMPANY)
+
+        self.assertTrue(receipt.merchant_match)
+        read_text.assert_called_once()
+
+    @override_settings(OCR_CACHE_MAX_ENTRIES=2, OCR_CACHE_TOUCH_INTERVAL=0)
+    def test_least_recently_used_evicted(self, read_text):
+        """Test the cache is bounded by evicting the oldest entries."""
+        images = [
+            File(creating.create_image(f'receipt {i}', 'receipt.jpg'))
+            for i in range(3)
+        ]
+        services.ocr(images[0])
+        services.ocr(images[1])
+        services.ocr(images[0])
+        services.ocr(images[2])
+        self.assertEqual(OcrResult.objects.count(), 3)
+
+        self.assertEqual(services.evict_cached_texts(), 1)
+
+        self.assertEqual(OcrResult.objects.count(), 2)
+        self.assertIsNotNone(
+            services.cached_text(services.image_digest(images[0])))
+        self.assertIsNone(
+            services.cached_text(services.image_digest(images[1])))
+
+    def test_not_preprocessed_by_default(self, read_text):
+        """Test photos are read as uploaded unless preprocessing is on."""
+        image = File(creating.create_image('receipt', 'receipt.jpg'))
+
+        with patch('receipt.services.preprocessing.prepare') as prepare:
+            services.ocr(image)
+
+        prepare.assert_not_called()
+
+    @override_settings(OCR_PREPROCESS=True)
+    def test_preprocessed_when_enabled(self, read_text):
+        """Test photos are prepared before reading when enabled."""
+        image = File(creating.create_image('receipt', 'receipt.jpg'))
+
+        with patch('receipt.services.preprocessing.prepare',
+                   wraps=preprocessing.prepare) as prepare:
+            self.assertEqual(services.ocr(image), RECEIPT_TEXT)
+
+        prepare.assert_called_once()
+
+    @override_settings(OCR_BACKEND='stub')
+    def test_stub_backend(self, read_text):
+        """Test the stub takes the text synthetic receipts carry."""
+        image = File(io.BytesIO(creating.create_receipt(RECEIPT_TEXT)))
+
+        self.assertEqual(services.ocr(image), RECEIPT_TEXT)
+        read_text.assert_not_called()
+
+    def test_hits_touch_last_used_once_per_interval(self, read_text):
+        """Test a hit only writes last_used when it has gone stale."""
+        image = File(creating.create_image('receipt', 'receipt.jpg'))
+        services.ocr(image)
+        digest = services.image_digest(image)
+
+        with self.assertNumQueries(1):
+            services.cached_text(digest)
+
+        OcrResult.objects.update(
+            last_used=timezone.now() - datetime.timedelta(days=1))
+        with self.assertNumQueries(2):
+            services.cached_text(digest)
+
+
+class RecordReceiptTests(TestCase):
+    """Test recording receipts by fingerprint."""
+
+    def test_record_once(self):
+        """Test a receipt is only recorded the first time."""
+        staff = creating.create_staff(email='record@example.com')
+        company = creating.create_company(user=staff)
+        receipt = services.parse_receipt(RECEIPT_TEXT, company)
+
+        self.assertTrue(Receipt.objects.record(receipt))
+        self.assertFalse(Receipt.objects.record(receipt))
+
+        recorded = Receipt.objects.get(company=company)
+        self.assertEqual(recorded.date, receipt.date)
+        self.assertEqual(recorded.total, Decimal('2.00'))
+
+    def test_receipt_without_total_matches(self):
+        """Test a receipt recorded without its total, as the migrated
+        ones are, is matched by a reading with the total."""
+        staff = creating.create_staff(email='legacy@example.com')
+        company = creating.create_company(user=staff)
+        receipt = services.parse_receipt(RECEIPT_TEXT, company)
+        Receipt.objects.create(
+            company=company, date=receipt.date, time=receipt.time,
+            fingerprint=services.fingerprint_without_total(receipt))
+
+        self.assertIsNone(Receipt.objects.record(receipt))
+        self.assertEqual(Receipt.objects.count(), 1)
@@ -0,0 +1,155 @@
+"""Test for the receipt processing tasks."""
+
+from unittest.mock import patch
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from core import ledger
+from core.models import MyCards, MyCardsHistory, Receipt, ReceiptJob
+from core.management.commands import creating
+from receipt.tasks import process_receipt
+
+
+RECEIPT_TEXT = 'Company Sample\n01/02/2023 10:11:12\nTotal 2.00'
+
+
+@patch('receipt.ocr.read_text',
+       return_value=RECEIPT_TEXT)
+class ProcessReceiptTests(TestCase):
+    """Test checking receipts in the background."""
+
+    def setUp(self):
+        user = creating.create_user(email='receipt@example.com')
+        staff = creating.create_staff(email='receiptstaff@example.com')
+        self.shopper = creating.create_shopper(user=user)
+        self.card = creating.create_card(
+            company=creating.create_company(user=staff), points_needed=3)
+        self.mycards = MyCards.objects.create(
+            shopper=self.shopper, card=self.card)
+
+    def run_job(self, content=''):
+        """Upload an image, process its job and return it reloaded."""
+        self.mycards.image.save(
+            'receipt.jpg', File(creating.create_image(content, 'r.jpg')),
+            save=False)
+        MyCards.objects.filter(pk=self.mycards.pk).update(
+            image=self.mycards.image.name)
+        job = ReceiptJob.objects.create(
+            mycards=self.mycards, image=self.mycards.image.name)
+        process_receipt(job.pk)
+        job.refresh_from_db()
+        self.mycards.refresh_from_db()
+
+        return job
+
+    def test_receipt_accepted(self, read_text):
+        """Test a valid receipt adds a point."""
+        job = self.run_job()
+
+        self.assertEqual(job.status, ReceiptJob.ACCEPTED)
+        self.assertEqual(ledger.balance(self.mycards.pk), 2)
+        self.assertEqual(Receipt.objects.count(), 1)
+        read_text.assert_called_once()
+
+    def test_receipt_from_other_company_rejected(self, read_text):
+        """Test a receipt without the company name is rejected."""
+        read_text.return_value = 'Another shop'
+
+        job = self.run_job()
+
+        self.assertEqual(job.status, ReceiptJob.REJECTED)
+        self.assertEqual(job.detail, 'Please take a new picture')
+        self.assertEqual(ledger.balance(self.mycards.pk), 1)
+
+    def test_duplicate_receipt_rejected(self, read_text):
+        """Test the same receipt only adds a point once."""
+        self.run_job()
+        job = self.run_job('another photo of the receipt')
+
+        self.assertEqual(job.status, ReceiptJob.DUPLICATE)
+        self.assertEqual(ledger.balance(self.mycards.pk), 2)
+        self.assertEqual(read_text.call_count, 2)
+
+    def test_same_image_not_read_again(self, read_text):
+        """Test uploading the same image again skips the OCR."""
+        self.run_job()
+        job = self.run_job()
+
+        self.assertEqual(job.status, ReceiptJob.DUPLICATE)
+        read_text.assert_called_once()
+
+    def test_card_completed(self, read_text):
+        """Test collecting every point finalizes the card."""
+        self.run_job()
+        read_text.return_value = RECEIPT_TEXT.replace('10:11', '10:12')
+        self.run_job('second receipt')
+
+        self.assertEqual(ledger.balance(self.mycards.pk), 0)
+        history = MyCardsHistory.objects.get(shopper=self.shopper)
+        self.assertEqual(history.card, self.card)
+        self.assertEqual(len(history.code), 6)
+
+    @override_settings(OCR_BACKEND='stub')
+    def test_jobs_read_their_own_image(self, read_text):
+        """Test two uploads queued at once each earn their own point."""
+        jobs = []
+        for time in ('10:11:12', '10:12:13'):
+            self.mycards.image.save('receipt.png', ContentFile(
+                creating.create_receipt(
+                    f'Company Sample\n01/02/2023 {time}\nTotal 2.00')),
+                save=False)
+            jobs.append(ReceiptJob.objects.create(
+                mycards=self.mycards, image=self.mycards.image.name))
+        MyCards.objects.filter(pk=self.mycards.pk).update(
+            image=self.mycards.image.name)
+
+        for job in jobs:
+            process_receipt(job.pk)
+            job.refresh_from_db()
+            self.assertEqual(job.status, ReceiptJob.ACCEPTED)
+        self.mycards.refresh_from_db()
+        self.assertEqual(ledger.balance(self.mycards.pk), 0)
+
+
+class AddPointTests(TestCase):
+    """Test adding points to a card by appending to its ledger."""
+
+    def setUp(self):
+        user = creating.create_user(email='points@example.com')
+        staff = creating.create_staff(email='pointsstaff@example.com')
+        card = creating.create_card(
+            company=creating.create_company(user=staff), points_needed=3)
+        self.mycards = MyCards.objects.create(
+            shopper=creating.create_shopper(user=user), card=card)
+
+    def test_add_point(self):
+        """Test a point is appended and returned without an UPDATE."""
+        updated = self.mycards.updated
+
+        with self.assertNumQueries(2):
+            self.assertEqual(ledger.add_point(self.mycards.pk, 3), 2)
+
+        self.assertEqual(ledger.balance(self.mycards.pk), 2)
+        self.mycards.refresh_from_db()
+        self.assertEqual(self.mycards.points, 1)
+        self.assertEqual(self.mycards.updated, updated)
+
+    def test_add_point_starts_over(self):
+        """Test the points start over once points_needed is reached."""
+        ledger.add_point(self.mycards.pk, 3)
+
+        self.assertEqual(ledger.add_point(self.mycards.pk, 3), 0)
+        self.assertEqual(ledger.balance(self.mycards.pk), 0)
+
+    def test_add_point_after_compaction(self):
+        """Test the balance counts the snapshot and the newer events."""
+        ledger.add_point(self.mycards.pk, 3)
+        ledger.compact(lag=0)
+
+        self.assertEqual(ledger.add_point(self.mycards.pk, 3), 0)
+
+    def test_add_point_missing_card(self):
+        """Test adding a point to a missing card returns None."""
+        self.assertIsNone(ledger.add_point(0, 3))
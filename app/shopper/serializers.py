@@ -9,8 +9,10 @@ from mycardshistory.serializers import MycardsHistoryDetailSerializer
 
 class ShopperSerializer(serializers.ModelSerializer):
     """Serializer for shoppers."""
-    my_cards = MycardsDetailSerializer(many=True, read_only=True)
-    finalized_cards = MycardsHistoryDetailSerializer(many=True, read_only=True)
+    my_cards = MycardsDetailSerializer(
+        source='mycards_set', many=True, read_only=True)
+    finalized_cards = MycardsHistoryDetailSerializer(
+        source='mycardshistory_set', many=True, read_only=True)
 
     class Meta:
         model = Shopper
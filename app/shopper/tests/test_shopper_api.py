@@ -6,7 +6,9 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Shopper
+from core.models import MyCards, MyCardsHistory, Shopper
+from core.management.commands import creating
+from core.testing import QueryCountMixin
 from shopper.serializers import ShopperSerializer, ShopperDetailSerializer
 
 SHOPPER_URL = reverse('shopper-list')
@@ -52,7 +54,7 @@ class PublicShopperAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateShopperAPITests(TestCase):
+class PrivateShopperAPITests(QueryCountMixin, TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
@@ -103,6 +105,50 @@ class PrivateShopperAPITests(TestCase):
         serializer = ShopperDetailSerializer(shopper)
         self.assertEqual(res.data, serializer.data)
 
+    def test_shopper_cards_nested(self):
+        """Test a shopper lists its cards and finalized cards."""
+        shopper = create_shopper(user=self.user)
+        staff = creating.create_staff(email='nestedstaff@example.com')
+        card = creating.create_card(
+            company=creating.create_company(user=staff))
+        mycards = MyCards.objects.create(shopper=shopper, card=card)
+        MyCardsHistory.objects.create(
+            shopper=shopper, card=card, company=card.company, code='ABC123')
+
+        res = self.client.get(detail_url(shopper.id))
+
+        self.assertEqual(res.data['my_cards'][0]['id'], mycards.id)
+        self.assertEqual(res.data['finalized_cards'][0]['code'], 'ABC123')
+
+    def test_shopper_list_queries_do_not_grow(self):
+        """Test listing shoppers does not query once per card."""
+        staff = creating.create_staff(email='querystaff@example.com')
+        card = creating.create_card(
+            company=creating.create_company(user=staff))
+
+        def add_shopper():
+            shopper = create_shopper(user=self.user)
+            MyCards.objects.create(shopper=shopper, card=card)
+            MyCardsHistory.objects.create(
+                shopper=shopper, card=card, company=card.company)
+
+        add_shopper()
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(SHOPPER_URL), add_shopper)
+
+    def test_shopper_detail_query_budget(self):
+        """Test a shopper with many cards runs a fixed number of queries."""
+        shopper = create_shopper(user=self.user)
+        staff = creating.create_staff(email='budgetstaff@example.com')
+        card = creating.create_card(
+            company=creating.create_company(user=staff))
+        for _ in range(5):
+            MyCards.objects.create(shopper=shopper, card=card)
+
+        with self.assertQueryBudget(7):
+            res = self.client.get(detail_url(shopper.id))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_create_shopper(self):
         """Test creating a shopper"""
         payload = {
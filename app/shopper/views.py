@@ -1,24 +1,46 @@
 """Views for Shopper APIs."""
 
+from django.db.models import Prefetch
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Shopper
+from core.authentication import CachedTokenAuthentication
+from core import ledger
+from core.conditional import ConditionalGetMixin
+from core.models import MyCards, MyCardsHistory, PointEvent, Shopper
 from shopper.serializers import ShopperDetailSerializer, ShopperSerializer
 
 
-class ShopperViewset(viewsets.ModelViewSet):
+class ShopperViewset(ConditionalGetMixin, viewsets.ModelViewSet):
     """Viewset for manage Shopper APIs."""
 
     serializer_class = ShopperDetailSerializer
     queryset = Shopper.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # A user has a shopper or two, cheaper to fetch than to aggregate.
+    conditional_page_actions = ('list',)
 
     def get_queryset(self):
         """Retrieve shopper for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        return self.queryset.filter(user=self.request.user).order_by(
+            '-id').prefetch_related(
+                Prefetch('mycards_set', queryset=ledger.with_balance(
+                    MyCards.objects.all())),
+                'mycardshistory_set')
+
+    def get_conditional_querysets(self):
+        """Make shoppers depend on their nested cards too."""
+        shoppers = self.get_conditional_queryset()
+
+        return [
+            (shoppers, 'updated'),
+            (MyCards.objects.filter(shopper__in=shoppers), 'updated'),
+            (PointEvent.objects.filter(mycards__shopper__in=shoppers),
+             'created'),
+            (MyCardsHistory.objects.filter(shopper__in=shoppers),
+             'finalized'),
+        ]
 
     def get_serializer_class(self):
         """Return the serrializer class for request."""
@@ -5,5 +5,6 @@ set -e
 python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py clear_metrics
 
 uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file